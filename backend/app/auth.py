@@ -1,14 +1,17 @@
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.database import get_db
-from app.models import User
+from app.database import get_db, get_async_db
+from app.models import User, Company, Membership
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -39,27 +42,83 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from token"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _token_user_id(token: str) -> uuid.UUID:
+    """User id carried by a valid access token"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+            raise _credentials_exception()
+        return uuid.UUID(user_id)
+    except (JWTError, ValueError):
+        raise _credentials_exception()
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user from token (sync routes: same session as get_db)"""
+    user = db.get(User, _token_user_id(token))
+    if user is None:
+        raise _credentials_exception()
     
-    user = db.query(User).filter(User.id == user_id).first()
+    return user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for async routes: one connection, from the async pool"""
+    # Polled endpoints: on the event loop, not in the threadpool
+    user = await db.get(User, _token_user_id(token))
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     return user
+
+
+def get_current_company(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> Company:
+    """Get the company the current user acts for (primary membership)"""
+    membership = (
+        db.query(Membership)
+        .filter(Membership.user_id == current_user.id)
+        .order_by(Membership.created_at)
+        .first()
+    )
+    
+    if membership is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User does not belong to a company"
+        )
+    
+    return membership.company
+
+
+def member_company_ids(user: User):
+    """Subquery of the companies a user belongs to, for inline authorization filters"""
+    return select(Membership.company_id).where(Membership.user_id == user.id).scalar_subquery()
+
+
+def current_company_id(user: User):
+    """Subquery of the user's primary company (as get_current_company), for async read paths"""
+    return (
+        select(Membership.company_id)
+        .where(Membership.user_id == user.id)
+        .order_by(Membership.created_at)
+        .limit(1)
+        .scalar_subquery()
+    )
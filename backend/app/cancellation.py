@@ -0,0 +1,12 @@
+from typing import Callable, Optional
+
+
+class ExecutionCancelled(Exception):
+    """Raised at a safe point once an execution has been asked to stop"""
+    pass
+
+
+def raise_if_cancelled(should_cancel: Optional[Callable[[], bool]]):
+    """Stop here if cancellation was requested"""
+    if should_cancel is not None and should_cancel():
+        raise ExecutionCancelled("Execution cancelled")
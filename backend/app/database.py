@@ -1,14 +1,60 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+
+def _create_engine(pool_size: int, max_overflow: int):
+    return create_engine(
+        settings.DATABASE_URL,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING
+    )
+
+
+engine = _create_engine(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(url: str) -> str:
+    """Same database through the asyncpg driver"""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+# Read paths polled by clients run on the event loop; requests are bounded
+# by pool connections instead of threadpool threads
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 Base = declarative_base()
 
 
+def configure_engine(pool_size: int, max_overflow: int):
+    """
+    Replace the engine with a freshly sized pool, e.g. in a forked worker child
+
+    Connections inherited from the parent are dropped without being closed,
+    since the parent still owns those sockets.
+    """
+    global engine
+    
+    engine.dispose(close=False)
+    engine = _create_engine(pool_size, max_overflow)
+    SessionLocal.configure(bind=engine)
+    
+    return engine
+
+
 def get_db():
     """Dependency for database sessions"""
     db = SessionLocal()
@@ -16,3 +62,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for async database sessions"""
+    async with AsyncSessionLocal() as db:
+        yield db
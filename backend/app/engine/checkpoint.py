@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import List, Optional
+
+from app.config import settings
+
+
+class CheckpointStore:
+    """
+    Disk-backed cache of intermediate execution states
+
+    A checkpoint holds the execution context after a prefix of the workflow
+    steps, keyed by the company, the input and the steps themselves. Entries
+    are evicted least recently used first once the directory exceeds its
+    size budget.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def input_key(
+        company_id: str,
+        content_hash: str,
+        sheet: Optional[str] = None,
+        read_options: Optional[dict] = None
+    ) -> str:
+        """
+        Identity of a parsed input frame: owner, file content, sheet and read options
+
+        The same file read as another sheet, or with other dtypes, is a
+        different input and must never resume from this one's checkpoints.
+        Nor may another company resume from them, even with identical content.
+        """
+        options = json.dumps(read_options or {}, sort_keys=True, default=str)
+        return f"{company_id}:{content_hash}:{sheet or ''}:{options}"
+
+    @staticmethod
+    def key(input_hash: str, steps: List[dict]) -> str:
+        """Build checkpoint key for an input file and a step prefix"""
+        digest = hashlib.sha256(input_hash.encode())
+        digest.update(json.dumps(steps, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def fits(self, size: int) -> bool:
+        """Whether a state of about size bytes is worth writing at all"""
+        # Anything larger would be evicted as soon as it was written
+        return size <= self.max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.ckpt")
+
+    def load(self, key: str) -> Optional[dict]:
+        """Return stored state, or None on a miss"""
+        path = self._path(key)
+
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception:
+            # Corrupt or partially evicted entry: treat as a miss
+            self._remove(path)
+            return None
+
+        # Mark as recently used
+        os.utime(path)
+        return state
+
+    def save(self, key: str, state: dict):
+        """Store state atomically, then enforce the size budget"""
+        os.makedirs(self.directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".ckpt"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        # Oldest first
+        entries.sort()
+
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+checkpoint_store = (
+    CheckpointStore(settings.CHECKPOINT_DIR, settings.CHECKPOINT_MAX_BYTES)
+    if settings.CHECKPOINT_ENABLED
+    else None
+)
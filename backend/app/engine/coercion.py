@@ -0,0 +1,78 @@
+import pandas as pd
+from pandas.api import types
+
+
+class ValueCoercionError(ValueError):
+    """Raised when a filter value cannot be compared with its column"""
+    pass
+
+
+_TRUE = ("true", "1", "yes")
+_FALSE = ("false", "0", "no")
+
+
+def coerce_filter_value(series: pd.Series, operator: str, value):
+    """
+    Convert a raw JSON filter value to the column's type, once per step
+
+    Comparisons then run as native vectorised ops instead of raising or
+    falling back to per-element object comparisons.
+
+    Args:
+        series: Column the filter applies to
+        operator: Filter operator
+        value: Raw value from the workflow JSON
+
+    Returns:
+        Value typed for the column (number, bool, Timestamp, or unchanged)
+
+    Raises:
+        ValueCoercionError: If the value cannot be compared with the column
+    """
+    if operator == "contains" or value is None:
+        return value
+
+    dtype = series.dtype
+
+    if types.is_bool_dtype(dtype):
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        raise ValueCoercionError(f"'{value}' is not a boolean")
+
+    if types.is_numeric_dtype(dtype):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        try:
+            return pd.to_numeric(str(value).strip())
+        except (ValueError, TypeError):
+            raise ValueCoercionError(f"'{value}' is not a number")
+
+    if types.is_datetime64_any_dtype(dtype):
+        try:
+            timestamp = pd.Timestamp(value)
+        except (ValueError, TypeError):
+            raise ValueCoercionError(f"'{value}' is not a date")
+
+        column_tz = getattr(dtype, "tz", None)
+        if column_tz is None and timestamp.tzinfo is not None:
+            return timestamp.tz_convert("UTC").tz_localize(None)
+        if column_tz is not None and timestamp.tzinfo is None:
+            return timestamp.tz_localize(column_tz)
+        return timestamp
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Typed like the categories so equality can run on integer codes
+        categories = dtype.categories
+        if types.is_numeric_dtype(categories.dtype) and isinstance(value, str):
+            try:
+                return pd.to_numeric(value.strip())
+            except ValueError:
+                raise ValueCoercionError(f"'{value}' is not a number")
+        return value
+
+    return value
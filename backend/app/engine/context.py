@@ -1,14 +1,35 @@
-from typing import Dict, List
+from typing import Callable, List, Optional
 import pandas as pd
 
+from app.cancellation import raise_if_cancelled
+from app.config import settings
+from app.engine.outputs import OutputStore
+
 
 class ExecutionContext:
     """Maintains state during workflow execution"""
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        file_resolver: Optional[Callable[[str], str]] = None,
+        copy_on_write: bool = False,
+        shared_input: bool = False,
+        outputs: Optional[OutputStore] = None,
+        should_cancel: Optional[Callable[[], bool]] = None
+    ):
         self.current_df = df
-        self.outputs: Dict[str, pd.DataFrame] = {}
+        if outputs is None:
+            outputs = OutputStore(settings.OUTPUT_MEMORY_BUDGET_BYTES, settings.SPILL_DIR)
+        self.outputs = outputs
         self.logs: List[dict] = []
+        self.file_resolver = file_resolver
+        # When set, frames may share buffers; pandas copies lazily on write
+        self.copy_on_write = copy_on_write
+        # Input frame is shared with a cache and must be treated as read-only
+        self.shared_input = shared_input
+        # Polled between steps; returns True once the execution must stop
+        self.should_cancel = should_cancel
 
     def log(self, step_type: str, message: str, affected_rows: int = 0):
         """Add a log entry for auditing"""
@@ -18,6 +39,56 @@ class ExecutionContext:
             "affected_rows": affected_rows
         })
 
+    def resolve_file(self, file_id: str) -> str:
+        """Return storage path of another file referenced by a step"""
+        if self.file_resolver is None:
+            raise ValueError("Referenced files are not available in this context")
+        return self.file_resolver(file_id)
+
+    def check_cancelled(self):
+        """Raise ExecutionCancelled if the execution was asked to stop"""
+        raise_if_cancelled(self.should_cancel)
+
+    def branch(
+        self,
+        df: pd.DataFrame,
+        should_cancel: Optional[Callable[[], bool]] = None
+    ) -> "ExecutionContext":
+        """
+        Context for one workflow branch starting from df
+
+        The branch has its own frame and logs but writes to the same outputs.
+        df is shared with sibling branches, so it is treated as read-only.
+        """
+        return ExecutionContext(
+            df,
+            file_resolver=self.file_resolver,
+            copy_on_write=self.copy_on_write,
+            shared_input=True,
+            outputs=self.outputs,
+            should_cancel=should_cancel or self.should_cancel
+        )
+
+    def snapshot(self) -> dict:
+        """Capture state so execution can resume after the current step"""
+        return {
+            "current_df": self.current_df,
+            "outputs": dict(self.outputs),
+            "logs": list(self.logs)
+        }
+
+    def restore(self, state: dict):
+        """Restore state captured by snapshot()"""
+        self.current_df = state["current_df"]
+        self.outputs.clear()
+        for name, df in state["outputs"].items():
+            self.outputs[name] = df
+        self.logs = list(state["logs"])
+
+    def close(self):
+        """Release output frames and their spill files"""
+        self.outputs.close()
+
     def get_result(self):
         """Return final execution result"""
         return {
@@ -0,0 +1,285 @@
+import html
+import os
+import re
+import zipfile
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.engine.dag import ROOT_FRAME, WorkflowGraphError, branch_levels, branch_parent
+
+
+# Excel sheet limit, header row included
+EXCEL_MAX_ROWS = 1_048_576
+
+# Rough per-cell costs, calibrated for openpyxl reading and xlsxwriter writing
+BYTES_PER_CELL = 48
+PARSE_CELLS_PER_SECOND = 150_000
+WRITE_CELLS_PER_SECOND = 200_000
+DISK_BYTES_PER_CELL = 8  # compressed xlsx, used when the sheet has no dimension
+CSV_PARSE_CELLS_PER_SECOND = 5_000_000
+CSV_SAMPLE_BYTES = 64 * 1024
+
+# Rows processed per second by each rule type
+STEP_ROWS_PER_SECOND = {
+    "filter": 20_000_000,
+    "move": 50_000_000,
+    "group_sum": 10_000_000,
+    "group_agg": 5_000_000,
+    "lookup": 5_000_000,
+    "join": 5_000_000,
+    "split_by": 10_000_000,
+    "sort": 2_000_000,
+    "top_n": 20_000_000,
+    "dedupe": 10_000_000,
+    "pivot": 5_000_000,
+}
+DEFAULT_STEP_ROWS_PER_SECOND = 5_000_000
+
+# Output size of aggregations relative to their input, when nothing better is known
+AGGREGATE_RATIO = 0.1
+
+DEFAULT_FILTER_SELECTIVITY = 0.5
+
+_DIMENSION_RE = re.compile(rb'<dimension ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+
+
+class ExecutionRejected(Exception):
+    """Raised when an execution cannot possibly succeed"""
+    pass
+
+
+def _column_number(letters: bytes) -> int:
+    number = 0
+    for char in letters:
+        number = number * 26 + (char - ord("A") + 1)
+    return number
+
+
+def _sheet_part(zf: zipfile.ZipFile, sheet: Optional[str]) -> Optional[str]:
+    """Worksheet XML part holding the named sheet (the first sheet when None)"""
+    names = set(zf.namelist())
+
+    if sheet is None:
+        if "xl/worksheets/sheet1.xml" in names:
+            return "xl/worksheets/sheet1.xml"
+        parts = sorted(name for name in names if re.fullmatch(r"xl/worksheets/sheet\d+\.xml", name))
+        return parts[0] if parts else None
+
+    # workbook.xml maps names to relationship ids, the rels file maps ids to parts
+    workbook = zf.read("xl/workbook.xml")
+    rels = zf.read("xl/_rels/workbook.xml.rels")
+
+    for attrs in re.findall(rb"<sheet\s([^>]*)/?>", workbook):
+        name = re.search(rb'name="([^"]*)"', attrs)
+        rel_id = re.search(rb'r:id="([^"]*)"', attrs)
+        if not name or not rel_id or html.unescape(name.group(1).decode()) != sheet:
+            continue
+        for rel in re.findall(rb"<Relationship\s([^>]*)/?>", rels):
+            if re.search(rb'Id="' + re.escape(rel_id.group(1)) + rb'"', rel):
+                target = re.search(rb'Target="([^"]*)"', rel).group(1).decode()
+                return target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    return None
+
+
+def sheet_dimensions(path: str, sheet: Optional[str] = None) -> Optional[Tuple[int, int]]:
+    """
+    Read (rows, columns) of a sheet from the xlsx dimension record
+
+    Only the head of the sheet XML is inflated, so this costs microseconds
+    regardless of file size. Returns None when the file has no usable record.
+    """
+    try:
+        with zipfile.ZipFile(path) as zf:
+            part = _sheet_part(zf, sheet)
+            if part is None:
+                return None
+
+            with zf.open(part) as f:
+                head = f.read(64 * 1024)
+    except (zipfile.BadZipFile, OSError, KeyError):
+        # Legacy .xls or unreadable file
+        return None
+
+    match = _DIMENSION_RE.search(head)
+    if not match or not match.group(3):
+        return None
+
+    first_col, first_row, last_col, last_row = match.groups()
+    rows = int(last_row) - int(first_row)  # header excluded
+    columns = _column_number(last_col) - _column_number(first_col) + 1
+
+    return rows, columns
+
+
+def delimited_dimensions(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Estimate (rows, columns) of a CSV/TSV file from its first bytes
+
+    Row count is extrapolated from the average line length of the sample.
+    """
+    sep = b"\t" if path.lower().endswith(".tsv") else b","
+
+    with open(path, "rb") as f:
+        sample = f.read(CSV_SAMPLE_BYTES)
+
+    lines = sample.splitlines()
+    if len(sample) == CSV_SAMPLE_BYTES and len(lines) > 1:
+        # Last line is probably cut
+        lines = lines[:-1]
+    if not lines:
+        return None
+
+    columns = lines[0].count(sep) + 1
+    bytes_per_line = max(1, sum(len(line) + 1 for line in lines) / len(lines))
+    rows = max(0, int(os.path.getsize(path) / bytes_per_line) - 1)  # header excluded
+
+    return rows, columns
+
+
+def estimate_execution(
+    path: str,
+    workflow: dict,
+    filter_selectivities: Optional[List[float]] = None,
+    sheet: Optional[str] = None
+) -> Dict:
+    """
+    Predict rows, peak memory and runtime of an execution before dispatch
+
+    Args:
+        path: Storage path of the input file
+        workflow: Workflow definition with steps and/or branches
+        filter_selectivities: Historical kept/input ratio of each filter step,
+            in step order; missing entries use DEFAULT_FILTER_SELECTIVITY
+        sheet: Workbook sheet to read (first sheet when None)
+
+    Returns:
+        Dict with input_rows, input_columns, peak_memory_bytes,
+        runtime_seconds, output_rows (per sheet) and engine_mode
+
+    Raises:
+        ExecutionRejected: If the execution cannot succeed
+    """
+    filter_selectivities = filter_selectivities or []
+
+    delimited = path.lower().endswith((".csv", ".tsv"))
+    dimensions = delimited_dimensions(path) if delimited else sheet_dimensions(path, sheet)
+    if dimensions:
+        input_rows, input_columns = dimensions
+    else:
+        input_columns = 10
+        input_rows = os.path.getsize(path) // (DISK_BYTES_PER_CELL * input_columns)
+
+    engine_mode = (
+        "copy_on_write"
+        if input_rows * input_columns * BYTES_PER_CELL >= settings.COPY_ON_WRITE_THRESHOLD_BYTES
+        else settings.ENGINE_MODE
+    )
+    shares_buffers = engine_mode == "copy_on_write"
+
+    rows = float(input_rows)
+    columns = input_columns
+    # Only an xlsx dimension record gives the real row count; CSV/TSV rows
+    # are extrapolated from a sample
+    rows_exact = dimensions is not None and not delimited
+    input_bytes = input_rows * input_columns * BYTES_PER_CELL
+    output_bytes = 0
+    output_rows: Dict[str, int] = {}
+    peak = input_bytes
+    runtime = input_rows * input_columns / (
+        CSV_PARSE_CELLS_PER_SECOND if delimited else PARSE_CELLS_PER_SECOND
+    )
+    filters_seen = 0
+
+    def walk(steps: list, rows: float, columns: int, rows_exact: bool, extra_bytes: int = 0):
+        """Account for steps run on one frame; return the frame's shape after them"""
+        nonlocal output_bytes, peak, runtime, filters_seen
+
+        for step in steps:
+            step_type = step.get("type")
+            runtime += rows / STEP_ROWS_PER_SECOND.get(step_type, DEFAULT_STEP_ROWS_PER_SECOND)
+
+            if step_type == "filter":
+                selectivity = (
+                    filter_selectivities[filters_seen]
+                    if filters_seen < len(filter_selectivities)
+                    else DEFAULT_FILTER_SELECTIVITY
+                )
+                filters_seen += 1
+                rows *= selectivity
+                rows_exact = False
+
+            elif step_type == "top_n":
+                rows = min(rows, float(step.get("n") or rows))
+
+            elif step_type == "dedupe":
+                # Unknown number of duplicates: keep the upper bound
+                rows_exact = False
+
+            elif step_type in ("lookup", "join"):
+                columns += len(step.get("columns") or [])
+                if step.get("how", "left") == "inner":
+                    # Unmatched rows are dropped
+                    rows_exact = False
+
+            elif step_type == "move":
+                output_rows[step.get("target_sheet")] = int(rows)
+                if not shares_buffers:
+                    output_bytes += int(rows * columns * BYTES_PER_CELL)
+
+                # Row count is only certain for an exact input count and
+                # no row-dropping step before
+                if rows_exact and rows >= EXCEL_MAX_ROWS:
+                    raise ExecutionRejected(
+                        f"Sheet '{step.get('target_sheet')}' would have {int(rows):,} rows, "
+                        f"over Excel's limit of {EXCEL_MAX_ROWS - 1:,}. Add a filter before moving."
+                    )
+
+            elif step_type == "split_by":
+                # Partitions are copies that together hold every row
+                output_rows[f"split_by:{step.get('column')}"] = int(rows)
+                output_bytes += int(rows * columns * BYTES_PER_CELL)
+
+            elif step_type in ("group_sum", "group_agg", "pivot"):
+                aggregated = int(rows * AGGREGATE_RATIO)
+                output_rows[step.get("target_sheet")] = aggregated
+                output_bytes += aggregated * columns * BYTES_PER_CELL
+
+            current_bytes = int(rows * columns * BYTES_PER_CELL)
+            peak = max(peak, input_bytes + extra_bytes + current_bytes + output_bytes)
+
+        return rows, columns, rows_exact
+
+    frame = walk(workflow.get("steps", []), rows, columns, rows_exact)
+    columns = frame[1]
+
+    # Branches of one level run concurrently: their frames are alive together
+    try:
+        levels = branch_levels(workflow.get("branches") or [])
+    except WorkflowGraphError:
+        levels = []  # reported by validation when the execution runs
+
+    frames = {ROOT_FRAME: frame}
+    for level in levels:
+        starts = [frames[branch_parent(branch)] for branch in level]
+        start_bytes = [int(r * c * BYTES_PER_CELL) for r, c, _ in starts]
+        for i, (branch, start) in enumerate(zip(level, starts)):
+            siblings = sum(start_bytes) - start_bytes[i]
+            frames[branch["name"]] = walk(branch.get("steps") or [], *start, extra_bytes=siblings)
+
+    runtime += sum(output_rows.values()) * columns / WRITE_CELLS_PER_SECOND
+
+    if peak > settings.MAX_EXECUTION_MEMORY_BYTES:
+        raise ExecutionRejected(
+            f"Estimated peak memory {peak / 1024 ** 3:.1f}GB for {input_rows:,} rows x "
+            f"{input_columns} columns exceeds the {settings.MAX_EXECUTION_MEMORY_BYTES / 1024 ** 3:.1f}GB "
+            "limit. Split the input file or filter it before upload."
+        )
+
+    return {
+        "input_rows": input_rows,
+        "input_columns": input_columns,
+        "output_rows": output_rows,
+        "peak_memory_bytes": int(peak),
+        "runtime_seconds": round(runtime, 2),
+        "engine_mode": engine_mode
+    }
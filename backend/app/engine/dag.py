@@ -0,0 +1,79 @@
+from typing import Dict, Iterator, List, Set
+
+
+# Name of the frame produced by the top-level steps (the input when there are none)
+ROOT_FRAME = "input"
+
+
+class WorkflowGraphError(ValueError):
+    """Raised when workflow branches do not form a valid DAG"""
+    pass
+
+
+def branch_parent(branch: dict) -> str:
+    """Frame a branch starts from"""
+    return branch.get("from", ROOT_FRAME)
+
+
+def workflow_steps(workflow: dict) -> Iterator[dict]:
+    """Every step of a workflow: top-level steps, then each branch's"""
+    yield from workflow.get("steps") or []
+    for branch in workflow.get("branches") or []:
+        if isinstance(branch, dict):
+            yield from branch.get("steps") or []
+
+
+def referenced_file_ids(workflow: dict) -> Set[str]:
+    """Ids of the files read by lookup/join steps"""
+    return {
+        str(step["reference_file_id"])
+        for step in workflow_steps(workflow)
+        if isinstance(step, dict) and step.get("type") in ("lookup", "join") and step.get("reference_file_id")
+    }
+
+
+def branch_levels(branches: List[dict]) -> List[List[dict]]:
+    """
+    Group branches into levels that can run concurrently
+
+    Every branch comes after the branch it starts from. Branches keep their
+    declaration order within a level, so logs and outputs are deterministic.
+
+    Raises:
+        WorkflowGraphError: On duplicate names, unknown parents or cycles
+    """
+    names: Dict[str, dict] = {}
+    for idx, branch in enumerate(branches):
+        if not isinstance(branch, dict):
+            raise WorkflowGraphError(f"Branch {idx}: must be an object")
+
+        name = branch.get("name")
+        if not isinstance(name, str) or not name:
+            raise WorkflowGraphError(f"Branch {idx}: missing 'name'")
+        if name == ROOT_FRAME:
+            raise WorkflowGraphError(f"Branch {idx}: '{ROOT_FRAME}' is reserved")
+        if name in names:
+            raise WorkflowGraphError(f"Branch {idx}: duplicate name '{name}'")
+        names[name] = branch
+
+    for name, branch in names.items():
+        parent = branch_parent(branch)
+        if parent != ROOT_FRAME and parent not in names:
+            raise WorkflowGraphError(f"Branch '{name}': unknown frame '{parent}' in 'from'")
+
+    # Kahn's algorithm, one level at a time
+    levels: List[List[dict]] = []
+    done = {ROOT_FRAME}
+    remaining = list(branches)
+
+    while remaining:
+        level = [branch for branch in remaining if branch_parent(branch) in done]
+        if not level:
+            cycle = ", ".join(f"'{branch['name']}'" for branch in remaining)
+            raise WorkflowGraphError(f"Branches {cycle} form a cycle")
+
+        levels.append(level)
+        done.update(branch["name"] for branch in level)
+        remaining = [branch for branch in remaining if branch["name"] not in done]
+
+    return levels
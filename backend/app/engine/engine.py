@@ -1,52 +1,279 @@
+import importlib.util
+import logging
+import threading
 import pandas as pd
-from typing import Dict
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Optional
 
+from app.cancellation import ExecutionCancelled
+from app.config import settings
+from app.engine.checkpoint import checkpoint_store
 from app.engine.context import ExecutionContext
+from app.engine.dag import ROOT_FRAME, branch_levels, branch_parent
+from app.engine.outputs import frame_bytes
 from app.engine.rules.factory import get_rule
 from app.engine.validator import validate_workflow
 
 
+logger = logging.getLogger(__name__)
+
+# standard: numpy dtypes, defensive copies between steps
+# copy_on_write: pandas copy-on-write, outputs share buffers with their parent
+ENGINE_MODES = ("standard", "copy_on_write")
+
+# pandas options are process-wide, not per thread: copy-on-write stays on
+# while any run (API threadpool, branch threads) still needs it
+_copy_on_write_lock = threading.Lock()
+_copy_on_write_users = 0
+_copy_on_write_previous = None
+
+
+@contextmanager
+def copy_on_write():
+    """Enable pandas copy-on-write for the duration, safely across threads"""
+    global _copy_on_write_users, _copy_on_write_previous
+    
+    with _copy_on_write_lock:
+        if _copy_on_write_users == 0:
+            _copy_on_write_previous = pd.get_option("mode.copy_on_write")
+            pd.set_option("mode.copy_on_write", True)
+        _copy_on_write_users += 1
+    
+    try:
+        yield
+    finally:
+        with _copy_on_write_lock:
+            _copy_on_write_users -= 1
+            if _copy_on_write_users == 0:
+                pd.set_option("mode.copy_on_write", _copy_on_write_previous)
+
+
 class RuleEngine:
     """Main orchestrator for workflow execution"""
     
-    def run(self, df: pd.DataFrame, workflow: dict) -> Dict:
+    def run(
+        self,
+        df: pd.DataFrame,
+        workflow: dict,
+        file_resolver: Optional[Callable[[str], str]] = None,
+        input_hash: Optional[str] = None,
+        mode: Optional[str] = None,
+        shared_input: bool = False,
+        should_cancel: Optional[Callable[[], bool]] = None
+    ) -> Dict:
         """
         Execute a workflow on a dataframe
         
         Args:
             df: Input pandas DataFrame
-            workflow: Workflow definition with steps
+            workflow: Workflow definition with steps and/or branches
+            file_resolver: Maps file ids referenced by steps to storage paths
+            input_hash: Identity of the input frame (see CheckpointStore.input_key);
+                enables step checkpoints (linear workflows only)
+            mode: One of ENGINE_MODES, defaults to settings.ENGINE_MODE
+            shared_input: df is shared (e.g. cached) and must never be modified
+            should_cancel: Polled before each step; True stops the run
             
         Returns:
             Dict with outputs and logs
             
         Raises:
             WorkflowValidationError: If workflow is invalid
-            Exception: If execution fails
+            ExecutionCancelled: If should_cancel returned True
+            Exception: If execution fails (the rule's error is its __cause__)
         """
         # Validate before execution
         validate_workflow(workflow, df)
         
+        mode = mode or settings.ENGINE_MODE
+        if mode not in ENGINE_MODES:
+            raise ValueError(f"Unknown engine mode: {mode}")
+        
         # Initialize context
-        context = ExecutionContext(df)
+        context = ExecutionContext(
+            df,
+            file_resolver=file_resolver,
+            copy_on_write=(mode == "copy_on_write"),
+            shared_input=shared_input,
+            should_cancel=should_cancel
+        )
+        
+        branches = workflow.get("branches")
+        
+        # Checkpoints are only valid for the mode (and dtypes) that produced them
+        checkpoint_hash = f"{input_hash}:{mode}" if input_hash and not branches else None
+        
+        try:
+            with self._mode_options(context, shared=bool(branches)):
+                self._execute_steps(context, workflow.get("steps", []), checkpoint_hash)
+                if branches:
+                    self._execute_branches(context, branches)
+        except Exception:
+            context.close()
+            raise
+        
+        # Caller owns the outputs and must close() them once written
+        return context.get_result()
+    
+    def _mode_options(self, context: ExecutionContext, shared: bool = False):
+        """pandas options scoped to one run"""
+        # Copy-on-write also guarantees a shared frame (cached input, parent of
+        # several branches) is never written through
+        if context.copy_on_write or context.shared_input or shared:
+            return copy_on_write()
+        return nullcontext()
+    
+    def _execute_steps(self, context: ExecutionContext, steps: list, input_hash: Optional[str]):
+        """Run steps in order, resuming from and writing checkpoints when possible"""
+        use_checkpoints = checkpoint_store is not None and input_hash is not None
+        
+        # Resume from the longest checkpointed step prefix
+        start = 0
+        if use_checkpoints:
+            start = self._resume(context, steps, input_hash)
+        
+        # Only the last few prefixes are stored: edits usually touch the tail
+        first_checkpoint = max(start + 1, len(steps) - settings.CHECKPOINT_TAIL_STEPS + 1)
         
         # Execute each step
-        for idx, step in enumerate(workflow["steps"]):
+        for idx in range(start, len(steps)):
+            self._execute_step(context, steps[idx], idx)
+            
+            if use_checkpoints and idx + 1 >= first_checkpoint:
+                self._checkpoint(context, steps[:idx + 1], input_hash)
+    
+    def _execute_step(self, context: ExecutionContext, step: dict, idx: int, where: str = ""):
+        """Run one step, logging and re-raising its failure"""
+        context.check_cancelled()
+        
+        rule_type = step.get("type")
+        try:
+            rule = get_rule(rule_type)
+            rule.execute(context, step)
+        except ExecutionCancelled:
+            raise
+        except Exception as e:
+            context.log(
+                "error",
+                f"Step {idx} ({rule_type}) failed: {str(e)}",
+                0
+            )
+            raise Exception(f"Execution failed {where}at step {idx}: {str(e)}") from e
+    
+    def _execute_branches(self, context: ExecutionContext, branches: List[dict]):
+        """
+        Run workflow branches level by level, independent branches in parallel
+        
+        Each branch starts from its parent's final frame without copying it
+        (copy-on-write is on for the whole run), and writes to the shared
+        outputs. pandas releases the GIL in most kernels, so branches of one
+        level overlap in a thread pool. Logs are merged in declaration order.
+        """
+        levels = branch_levels(branches)
+        frames = {ROOT_FRAME: context.current_df}
+        # Parent frames are dropped once every child has started from them
+        children = Counter(branch_parent(branch) for branch in branches)
+        
+        # Set when the run fails or is interrupted (e.g. a time limit raised
+        # in this thread): running branches stop at their next step
+        abort = threading.Event()
+        
+        def should_cancel() -> bool:
+            return abort.is_set() or (context.should_cancel is not None and context.should_cancel())
+        
+        workers = max(1, min(settings.ENGINE_BRANCH_WORKERS, max(len(level) for level in levels)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="branch") as pool:
             try:
-                rule_type = step["type"]
-                rule = get_rule(rule_type)
-                rule.execute(context, step)
-            except Exception as e:
-                context.log(
-                    "error",
-                    f"Step {idx} ({rule_type}) failed: {str(e)}",
-                    0
-                )
-                raise Exception(f"Execution failed at step {idx}: {str(e)}")
+                for level in levels:
+                    futures = [
+                        pool.submit(
+                            self._run_branch,
+                            context.branch(frames[branch_parent(branch)], should_cancel),
+                            branch
+                        )
+                        for branch in level
+                    ]
+                    
+                    # Wait for the whole level so no branch outlives a failed run
+                    failure = None
+                    for branch, future in zip(level, futures):
+                        try:
+                            branch_context = future.result()
+                        except Exception as e:
+                            abort.set()
+                            # Siblings stopped by the abort are not the cause
+                            if failure is None or isinstance(failure, ExecutionCancelled):
+                                failure = e
+                            continue
+                        
+                        frames[branch["name"]] = branch_context.current_df
+                        for entry in branch_context.logs:
+                            context.log(
+                                entry["step_type"],
+                                f"[{branch['name']}] {entry['message']}",
+                                entry["affected_rows"]
+                            )
+                    
+                    if failure is not None:
+                        raise failure
+                    
+                    for branch in level:
+                        parent = branch_parent(branch)
+                        children[parent] -= 1
+                        if children[parent] == 0:
+                            frames.pop(parent, None)
+            except BaseException:
+                abort.set()
+                raise
+    
+    def _run_branch(self, context: ExecutionContext, branch: dict) -> ExecutionContext:
+        """Run the steps of one branch in its own context"""
+        for idx, step in enumerate(branch["steps"]):
+            self._execute_step(context, step, idx, where=f"in branch '{branch['name']}' ")
+        return context
+    
+    def _resume(self, context: ExecutionContext, steps: list, input_hash: str) -> int:
+        """Restore the longest checkpointed prefix; return the next step index"""
+        for prefix_len in range(len(steps), 0, -1):
+            state = checkpoint_store.load(checkpoint_store.key(input_hash, steps[:prefix_len]))
+            if state is None:
+                continue
+            
+            # Not an execution log: those are stored one per step, in step order
+            context.restore(state)
+            logger.info("Resumed from checkpoint after step %d", prefix_len - 1)
+            return prefix_len
         
-        return context.get_result()
+        return 0
     
-    def preview(self, df: pd.DataFrame, workflow: dict, max_rows: int = 20) -> Dict:
+    def _checkpoint(self, context: ExecutionContext, prefix: list, input_hash: str):
+        """Persist context state after a step prefix; failures never fail the run"""
+        if context.outputs.has_spilled:
+            # Snapshotting would read spilled sheets back into memory
+            return
+        
+        # Estimated before pickling: an oversized state would be written only
+        # to be evicted at once
+        size = frame_bytes(context.current_df) + context.outputs.total_bytes
+        if not checkpoint_store.fits(size):
+            logger.info("Skipped checkpoint after step %d: about %d bytes", len(prefix) - 1, size)
+            return
+        
+        try:
+            checkpoint_store.save(checkpoint_store.key(input_hash, prefix), context.snapshot())
+        except Exception:
+            logger.warning("Could not save checkpoint after step %d", len(prefix) - 1, exc_info=True)
+    
+    def preview(
+        self,
+        df: pd.DataFrame,
+        workflow: dict,
+        max_rows: int = 20,
+        file_resolver: Optional[Callable[[str], str]] = None,
+        shared_input: bool = False
+    ) -> Dict:
         """
         Preview workflow execution without persisting
         
@@ -54,28 +281,34 @@ class RuleEngine:
             df: Input DataFrame
             workflow: Workflow definition
             max_rows: Maximum rows to return in preview
+            file_resolver: Maps file ids referenced by steps to storage paths
+            shared_input: df is shared (e.g. cached) and must never be modified
             
         Returns:
-            Dict with before/after snapshots
+            Dict with before/after snapshots as DataFrames (see
+            app.serialization.preview_to_json)
         """
         validate_workflow(workflow, df)
         
-        # Take snapshot before
-        before = df.head(max_rows).to_dict(orient="records")
+        # Take snapshot before; serialised straight from the frame later
+        before = df.head(max_rows)
         
         # Execute workflow
-        result = self.run(df, workflow)
+        result = self.run(df, workflow, file_resolver=file_resolver, shared_input=shared_input)
         
         # Take snapshot after
         after_data = {}
-        if result["outputs"]:
-            # Show first output sheet
-            first_sheet = list(result["outputs"].keys())[0]
-            after_data["sheet"] = first_sheet
-            after_data["rows"] = result["outputs"][first_sheet].head(max_rows).to_dict(orient="records")
-        else:
-            # No outputs created, show filtered current_df (not available after execution)
-            after_data["rows"] = []
+        try:
+            if result["outputs"]:
+                # Show first output sheet
+                first_sheet = list(result["outputs"].keys())[0]
+                after_data["sheet"] = first_sheet
+                after_data["rows"] = result["outputs"][first_sheet].head(max_rows).copy()
+            else:
+                # No outputs created, show filtered current_df (not available after execution)
+                after_data["rows"] = None
+        finally:
+            result["outputs"].close()
         
         return {
             "before": before,
@@ -83,6 +316,14 @@ class RuleEngine:
             "logs": result["logs"]
         }
 
+    def read_options(self, mode: Optional[str] = None) -> Dict:
+        """Extra pandas reader arguments for the given engine mode"""
+        mode = mode or settings.ENGINE_MODE
+        if mode == "copy_on_write" and importlib.util.find_spec("pyarrow") is not None:
+            # Arrow-backed columns: compact strings, zero-copy slicing
+            return {"dtype_backend": "pyarrow"}
+        return {}
+
 
 # Singleton instance
 engine = RuleEngine()
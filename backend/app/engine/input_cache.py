@@ -0,0 +1,44 @@
+import os
+from typing import Callable, Hashable
+
+import pandas as pd
+
+from app.config import settings
+from app.engine.cache import LRUCache
+
+
+# Parsed input files, shared by executions in this process
+input_cache = LRUCache(settings.INPUT_CACHE_MAX_BYTES)
+
+
+def load_input_frame(
+    file_id: str,
+    path: str,
+    read: Callable[[], pd.DataFrame],
+    variant: Hashable = None
+) -> pd.DataFrame:
+    """
+    Return the parsed input file, reading it only on a cache miss
+
+    Entries are keyed by file id plus mtime and size, so a rewritten file is
+    never served stale. The returned frame is shared with the cache: run the
+    engine with shared_input=True so nothing can modify it in place.
+
+    Args:
+        file_id: UUID of the file record
+        path: Storage path of the file
+        read: Parses the file on a miss
+        variant: Distinguishes reads of the same file with different options
+
+    Returns:
+        Parsed DataFrame (read-only)
+    """
+    stat = os.stat(path)
+    key = (str(file_id), stat.st_mtime_ns, stat.st_size, variant)
+
+    df = input_cache.get(key)
+    if df is None:
+        df = read()
+        input_cache.put(key, df, int(df.memory_usage(index=True, deep=True).sum()))
+
+    return df
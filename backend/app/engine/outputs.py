@@ -0,0 +1,194 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+# Rows measured per object column by frame_bytes
+SIZE_SAMPLE_ROWS = 1000
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """
+    Approximate in-memory size of a frame, in time independent of its length
+
+    Fixed-width columns are counted exactly. Object columns (Python strings)
+    are measured deeply on evenly spaced sample rows and scaled up.
+    """
+    size = int(df.memory_usage(index=True, deep=False).sum())
+    objects = [idx for idx, dtype in enumerate(df.dtypes) if dtype == object]
+    if not objects or len(df) == 0:
+        return size
+
+    sample = df.iloc[::max(1, len(df) // SIZE_SAMPLE_ROWS), objects]
+    referenced = (
+        sample.memory_usage(index=False, deep=True).sum()
+        - sample.memory_usage(index=False, deep=False).sum()
+    )
+    return size + int(referenced * len(df) / len(sample))
+
+
+class OutputStore(MutableMapping):
+    """
+    Output sheets of one execution, bounded by a memory budget
+
+    Behaves like a dict of sheet name -> DataFrame. When the frames held in
+    memory exceed the budget, the oldest finished sheets are spilled to a
+    temporary columnar file and read back one at a time on access, so the
+    writer streams them instead of holding every sheet at once.
+
+    Frames added with shared=True alias buffers that stay alive anyway (the
+    working frame under copy-on-write): they do not count against the budget
+    and are never spilled, since spilling them would free nothing.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._order: list = []
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._sizes: Dict[str, int] = {}
+        self._shared: set = set()
+        self._spilled: Dict[str, str] = {}
+        self._memory = 0
+        self._tmpdir: Optional[str] = None
+        self._spill_seq = 0
+        self._lock = threading.RLock()
+
+    def __setitem__(self, name: str, df: pd.DataFrame):
+        self.add(name, df)
+
+    def add(self, name: str, df: pd.DataFrame, shared: bool = False):
+        """Store a sheet; shared frames alias memory owned by the running execution"""
+        with self._lock:
+            if name in self:
+                del self[name]
+
+            self._order.append(name)
+            self._frames[name] = df
+            self._sizes[name] = frame_bytes(df)
+            if shared:
+                self._shared.add(name)
+            else:
+                self._memory += self._sizes[name]
+
+            self._enforce_budget()
+
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        with self._lock:
+            if name in self._frames:
+                return self._frames[name]
+            path = self._spilled.get(name)
+
+        if path is None:
+            raise KeyError(name)
+
+        return self._read(path)
+
+    def __delitem__(self, name: str):
+        with self._lock:
+            if name in self._frames:
+                del self._frames[name]
+                size = self._sizes.pop(name)
+                if name in self._shared:
+                    self._shared.discard(name)
+                else:
+                    self._memory -= size
+            elif name in self._spilled:
+                os.remove(self._spilled.pop(name))
+            else:
+                raise KeyError(name)
+            self._order.remove(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._order))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, name) -> bool:
+        return name in self._frames or name in self._spilled
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held in memory by this store (shared frames excluded)"""
+        return self._memory
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes of every in-memory frame, shared ones included"""
+        return sum(self._sizes.values())
+
+    @property
+    def has_spilled(self) -> bool:
+        return bool(self._spilled)
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Held by writers that derive sheet names from the existing ones"""
+        return self._lock
+
+    def clear(self):
+        # MutableMapping.clear() would read every spilled frame back first
+        self.close()
+
+    def close(self):
+        """Drop all frames and delete spill files"""
+        with self._lock:
+            self._order.clear()
+            self._frames.clear()
+            self._sizes.clear()
+            self._shared.clear()
+            self._spilled.clear()
+            self._memory = 0
+            if self._tmpdir:
+                shutil.rmtree(self._tmpdir, ignore_errors=True)
+                self._tmpdir = None
+
+    def _enforce_budget(self):
+        # Oldest sheets are finished first, spill them first
+        for name in list(self._order):
+            if self._memory <= self.max_bytes:
+                break
+            if name in self._frames and name not in self._shared:
+                self._spill(name)
+
+    def _spill(self, name: str):
+        if self._tmpdir is None:
+            if self.spill_dir:
+                os.makedirs(self.spill_dir, exist_ok=True)
+            self._tmpdir = tempfile.mkdtemp(prefix="spill-", dir=self.spill_dir)
+
+        df = self._frames.pop(name)
+        self._spill_seq += 1
+        base = os.path.join(self._tmpdir, str(self._spill_seq))
+        self._spilled[name] = self._write(df, base)
+        self._memory -= self._sizes.pop(name)
+
+    @staticmethod
+    def _write(df: pd.DataFrame, base: str) -> str:
+        if HAS_PYARROW:
+            try:
+                path = f"{base}.parquet"
+                df.to_parquet(path, compression="lz4")
+                return path
+            except Exception:
+                # Mixed-type object columns have no Arrow type; keep them as pickle
+                pass
+
+        path = f"{base}.pkl"
+        df.to_pickle(path)
+        return path
+
+    @staticmethod
+    def _read(path: str) -> pd.DataFrame:
+        if path.endswith(".parquet"):
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from app.config import settings
+from app.engine.cache import LRUCache
+from app.readers.factory import read_dataframe
+from app.storage import file_content_hash
+
+
+# Parsed and indexed reference tables, shared by all executions in this worker
+reference_cache = LRUCache(settings.REFERENCE_CACHE_MAX_BYTES)
+
+
+def load_reference_table(path: str, key: str) -> pd.DataFrame:
+    """
+    Load a reference table indexed by its key column
+
+    The table is parsed once per file content and key, then served from
+    the worker-local cache. The returned frame must be treated as read-only.
+
+    Args:
+        path: Storage path of the reference file
+        key: Column used as lookup key
+
+    Returns:
+        DataFrame indexed by key, first occurrence of each key kept
+    """
+    cache_key = (file_content_hash(path), key)
+
+    table = reference_cache.get(cache_key)
+    if table is not None:
+        return table
+
+    df = read_dataframe(path)
+
+    if key not in df.columns:
+        raise ValueError(f"Column '{key}' not found in reference table")
+
+    # VLOOKUP semantics: first match wins
+    table = df.drop_duplicates(subset=key, keep="first").set_index(key)
+
+    # Build the index hash table now so cached copies carry it
+    table.index.get_indexer(table.index[:1])
+
+    reference_cache.put(cache_key, table, int(table.memory_usage(index=True, deep=True).sum()))
+
+    return table
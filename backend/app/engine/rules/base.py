@@ -3,7 +3,12 @@ from app.engine.context import ExecutionContext
 
 
 class Rule(ABC):
-    """Base class for all workflow rules"""
+    """
+    Base class for all workflow rules
+    
+    Rules replace context.current_df or add to context.outputs; they never
+    modify a DataFrame in place, since the input may be shared with a cache.
+    """
     
     @abstractmethod
     def execute(self, context: ExecutionContext, params: dict):
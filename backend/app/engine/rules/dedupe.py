@@ -0,0 +1,29 @@
+from app.engine.rules.base import Rule
+
+
+class DedupeRule(Rule):
+    """Remove duplicate rows, optionally comparing only some columns"""
+    
+    def execute(self, context, params):
+        columns = params.get("columns")
+        keep = params.get("keep", "first")
+        
+        df = context.current_df
+        
+        if columns:
+            for column in columns:
+                if column not in df.columns:
+                    raise ValueError(f"Column '{column}' not found")
+        
+        if keep not in ("first", "last"):
+            raise ValueError(f"Unsupported keep: {keep}")
+        
+        # Hash-based, O(n) over the selected columns
+        deduped_df = df.drop_duplicates(subset=columns or None, keep=keep)
+        
+        context.current_df = deduped_df
+        context.log(
+            "dedupe",
+            f"Removed {len(df) - len(deduped_df)} duplicate rows by {columns or 'all columns'}",
+            len(deduped_df)
+        )
@@ -1,12 +1,27 @@
 from app.engine.rules.filter import FilterRule
 from app.engine.rules.move import MoveRule
 from app.engine.rules.group_sum import GroupSumRule
+from app.engine.rules.lookup import LookupRule
+from app.engine.rules.group_agg import GroupAggRule
+from app.engine.rules.split_by import SplitByRule
+from app.engine.rules.sort import SortRule
+from app.engine.rules.top_n import TopNRule
+from app.engine.rules.dedupe import DedupeRule
+from app.engine.rules.pivot import PivotRule
 
 
 RULE_REGISTRY = {
     "filter": FilterRule,
     "move": MoveRule,
     "group_sum": GroupSumRule,
+    "lookup": LookupRule,
+    "join": LookupRule,
+    "group_agg": GroupAggRule,
+    "split_by": SplitByRule,
+    "sort": SortRule,
+    "top_n": TopNRule,
+    "dedupe": DedupeRule,
+    "pivot": PivotRule,
 }
 
 
@@ -1,4 +1,8 @@
+import numpy as np
+import pandas as pd
+
 from app.engine.rules.base import Rule
+from app.engine.coercion import coerce_filter_value
 
 
 class FilterRule(Rule):
@@ -13,22 +17,30 @@ class FilterRule(Rule):
             raise ValueError(f"Column '{column}' not found in dataframe")
         
         df = context.current_df
+        series = df[column]
+        
+        # Typed once against the column dtype, so comparisons stay vectorised
+        value = coerce_filter_value(series, operator, value)
         
         # Apply operator
-        if operator == "=":
-            mask = df[column] == value
+        if operator in ("=", "!=") and isinstance(series.dtype, pd.CategoricalDtype):
+            mask = self._categorical_equals(series, value)
+            if operator == "!=":
+                mask = ~mask
+        elif operator == "=":
+            mask = series == value
         elif operator == "!=":
-            mask = df[column] != value
+            mask = series != value
         elif operator == ">":
-            mask = df[column] > value
+            mask = series > value
         elif operator == "<":
-            mask = df[column] < value
+            mask = series < value
         elif operator == ">=":
-            mask = df[column] >= value
+            mask = series >= value
         elif operator == "<=":
-            mask = df[column] <= value
+            mask = series <= value
         elif operator == "contains":
-            mask = df[column].astype(str).str.contains(str(value), case=False, na=False)
+            mask = series.astype(str).str.contains(str(value), case=False, na=False)
         else:
             raise ValueError(f"Unsupported operator: {operator}")
         
@@ -40,3 +52,11 @@ class FilterRule(Rule):
             f"Filtered by {column} {operator} {value}",
             len(filtered_df)
         )
+    
+    @staticmethod
+    def _categorical_equals(series, value):
+        """Equality on integer category codes instead of labels"""
+        code = series.cat.categories.get_indexer([value])[0]
+        if code == -1:
+            return pd.Series(np.zeros(len(series), dtype=bool), index=series.index)
+        return series.cat.codes == code
@@ -0,0 +1,50 @@
+from app.engine.rules.base import Rule
+
+
+SUPPORTED_AGGREGATIONS = ("sum", "count", "mean", "min", "max", "nunique", "first")
+
+
+class GroupAggRule(Rule):
+    """Group by one or more columns and compute several aggregations in one pass"""
+
+    def execute(self, context, params):
+        group_by = params.get("group_by")
+        aggregations = params.get("aggregations")
+        target_sheet = params.get("target_sheet")
+
+        if not all([group_by, aggregations, target_sheet]):
+            raise ValueError("group_by, aggregations, and target_sheet are required")
+
+        keys = [group_by] if isinstance(group_by, str) else list(group_by)
+        df = context.current_df
+
+        for column in keys:
+            if column not in df.columns:
+                raise ValueError(f"Column '{column}' not found")
+
+        named = {}
+        for agg in aggregations:
+            field = agg.get("field")
+            func = agg.get("agg")
+
+            if field not in df.columns:
+                raise ValueError(f"Column '{field}' not found")
+
+            if func not in SUPPORTED_AGGREGATIONS:
+                raise ValueError(f"Unsupported aggregation: {func}")
+
+            named[agg.get("as") or f"{field}_{func}"] = (field, func)
+
+        # Single groupby pass for every aggregation
+        grouped_df = (
+            df
+            .groupby(keys, sort=False, as_index=False)
+            .agg(**named)
+        )
+
+        context.outputs[target_sheet] = grouped_df
+        context.log(
+            "group_agg",
+            f"Grouped by {keys}, computed {list(named)}, created sheet '{target_sheet}'",
+            len(grouped_df)
+        )
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from app.engine.rules.base import Rule
+from app.engine.reference import load_reference_table
+
+
+class LookupRule(Rule):
+    """Enrich rows with columns from a reference file (VLOOKUP)"""
+
+    def execute(self, context, params):
+        reference_file_id = params.get("reference_file_id")
+        on = params.get("on")
+        reference_key = params.get("reference_key") or on
+        columns = params.get("columns")
+        how = params.get("how", "left")
+
+        if not all([reference_file_id, on, columns]):
+            raise ValueError("reference_file_id, on, and columns are required")
+
+        if how not in ("left", "inner"):
+            raise ValueError(f"Unsupported join type: {how}")
+
+        df = context.current_df
+
+        if on not in df.columns:
+            raise ValueError(f"Column '{on}' not found in dataframe")
+
+        table = load_reference_table(context.resolve_file(reference_file_id), reference_key)
+
+        missing = [c for c in columns if c not in table.columns]
+        if missing:
+            raise ValueError(f"Columns {missing} not found in reference table")
+
+        # Probe the cached hash index once for all keys; misses are -1
+        positions = table.index.get_indexer(df[on])
+        found = positions >= 0
+        matched = int(found.sum())
+
+        if how == "inner":
+            df = df[found]
+            positions = positions[found]
+
+        # Gather by position, filling misses with NA (as reindex would)
+        enriched = df.assign(**{
+            c: pd.Series(table[c].array.take(positions, allow_fill=True), index=df.index)
+            for c in columns
+        })
+
+        context.current_df = enriched
+        context.log(
+            "lookup",
+            f"Looked up {columns} by '{on}' ({how} join), matched {matched} of {len(positions)} rows",
+            len(enriched)
+        )
@@ -10,7 +10,11 @@ class MoveRule(Rule):
         if not target_sheet:
             raise ValueError("target_sheet is required")
         
-        context.outputs[target_sheet] = context.current_df.copy()
+        if context.copy_on_write:
+            # The output shares buffers with current_df: no copy, no budget
+            context.outputs.add(target_sheet, context.current_df, shared=True)
+        else:
+            context.outputs[target_sheet] = context.current_df.copy()
         context.log(
             "move",
             f"Moved {len(context.current_df)} rows to sheet '{target_sheet}'",
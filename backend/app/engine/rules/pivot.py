@@ -0,0 +1,66 @@
+from app.config import settings
+from app.engine.rules.base import Rule
+
+
+SUPPORTED_PIVOT_AGGREGATIONS = ("sum", "count", "mean", "min", "max")
+
+
+class PivotRule(Rule):
+    """Build a wide pivot table: rows by one key, columns by another"""
+    
+    def execute(self, context, params):
+        index = params.get("index")
+        columns = params.get("columns")
+        values = params.get("values")
+        aggfunc = params.get("aggfunc", "sum")
+        fill_value = params.get("fill_value", 0)
+        margins = params.get("margins", False)
+        margins_name = params.get("margins_name", "Total")
+        max_columns = min(params.get("max_columns", settings.PIVOT_MAX_COLUMNS), settings.PIVOT_MAX_COLUMNS)
+        target_sheet = params.get("target_sheet")
+        
+        if not all([index, columns, values, target_sheet]):
+            raise ValueError("index, columns, values, and target_sheet are required")
+        
+        if aggfunc not in SUPPORTED_PIVOT_AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation: {aggfunc}")
+        
+        df = context.current_df
+        keys = [index] if isinstance(index, str) else list(index)
+        
+        for column in keys + [columns, values]:
+            if column not in df.columns:
+                raise ValueError(f"Column '{column}' not found")
+        
+        # Check width before building anything wide; margins add a total column
+        width = df[columns].nunique() + (1 if margins else 0)
+        if width > max_columns:
+            raise ValueError(
+                f"Pivot on '{columns}' would have {width} columns"
+                f"{' (including margins)' if margins else ''}, "
+                f"over the limit of {max_columns} pivot columns"
+            )
+        
+        # Single grouped pass, unstacked into the wide layout
+        wide_df = df.pivot_table(
+            index=keys,
+            columns=columns,
+            values=values,
+            aggfunc=aggfunc,
+            fill_value=fill_value,
+            margins=margins,
+            margins_name=margins_name,
+            observed=True,
+            sort=False
+        )
+        
+        # Excel headers must be flat strings
+        wide_df.columns = [str(c) for c in wide_df.columns]
+        wide_df = wide_df.reset_index()
+        
+        context.outputs[target_sheet] = wide_df
+        context.log(
+            "pivot",
+            f"Pivoted '{values}' ({aggfunc}) by {keys} x '{columns}', created sheet '{target_sheet}'",
+            len(wide_df)
+        )
@@ -0,0 +1,33 @@
+from app.engine.rules.base import Rule
+
+
+class SortRule(Rule):
+    """Sort rows by one or more columns"""
+    
+    def execute(self, context, params):
+        by = params.get("by")
+        ascending = params.get("ascending", True)
+        
+        if not by:
+            raise ValueError("by is required")
+        
+        columns = [by] if isinstance(by, str) else list(by)
+        
+        for column in columns:
+            if column not in context.current_df.columns:
+                raise ValueError(f"Column '{column}' not found")
+        
+        # Stable, so rows with equal keys keep their original order
+        sorted_df = context.current_df.sort_values(
+            columns,
+            ascending=ascending,
+            kind="stable",
+            na_position="last"
+        )
+        
+        context.current_df = sorted_df
+        context.log(
+            "sort",
+            f"Sorted by {columns} ({'ascending' if ascending is True else ascending})",
+            len(sorted_df)
+        )
@@ -0,0 +1,66 @@
+import re
+
+import pandas as pd
+
+from app.config import settings
+from app.engine.rules.base import Rule
+
+
+# Excel sheet names: at most 31 characters, none of []:*?/\
+SHEET_NAME_MAX_LENGTH = 31
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def sheet_name_for(prefix: str, value, used: set) -> str:
+    """Build a valid, unique sheet name for a partition value"""
+    label = "(blank)" if pd.isna(value) else str(value)
+    name = _INVALID_SHEET_CHARS.sub("_", f"{prefix}{label}").strip() or "_"
+    name = name[:SHEET_NAME_MAX_LENGTH]
+
+    candidate = name
+    counter = 2
+    while candidate in used:
+        suffix = f"~{counter}"
+        candidate = name[:SHEET_NAME_MAX_LENGTH - len(suffix)] + suffix
+        counter += 1
+
+    used.add(candidate)
+    return candidate
+
+
+class SplitByRule(Rule):
+    """Partition current dataframe into one output sheet per distinct value"""
+
+    def execute(self, context, params):
+        column = params.get("column")
+        prefix = params.get("target_sheet_prefix", "")
+        max_partitions = params.get("max_partitions", settings.SPLIT_MAX_PARTITIONS)
+
+        if not column:
+            raise ValueError("column is required")
+
+        df = context.current_df
+
+        if column not in df.columns:
+            raise ValueError(f"Column '{column}' not found")
+
+        # One factorization pass; groups are taken from it below
+        grouped = df.groupby(column, sort=False, dropna=False)
+
+        if grouped.ngroups > min(max_partitions, settings.SPLIT_MAX_PARTITIONS):
+            raise ValueError(
+                f"Column '{column}' has {grouped.ngroups} distinct values, "
+                f"over the limit of {min(max_partitions, settings.SPLIT_MAX_PARTITIONS)} sheets"
+            )
+
+        # Concurrent branches may be writing sheets too: pick names atomically
+        with context.outputs.lock:
+            used = set(context.outputs)
+            for value, partition in grouped:
+                context.outputs[sheet_name_for(prefix, value, used)] = partition
+
+        context.log(
+            "split_by",
+            f"Split {len(df)} rows by '{column}' into {grouped.ngroups} sheets",
+            len(df)
+        )
@@ -0,0 +1,35 @@
+from app.engine.rules.base import Rule
+
+
+class TopNRule(Rule):
+    """Keep the N rows with the largest (or smallest) values"""
+    
+    def execute(self, context, params):
+        by = params.get("by")
+        n = params.get("n")
+        order = params.get("order", "largest")
+        keep = params.get("keep", "first")
+        
+        if not by or n is None:
+            raise ValueError("by and n are required")
+        
+        columns = [by] if isinstance(by, str) else list(by)
+        
+        for column in columns:
+            if column not in context.current_df.columns:
+                raise ValueError(f"Column '{column}' not found")
+        
+        # Partial selection, O(n log k): no full sort of the frame
+        if order == "largest":
+            top_df = context.current_df.nlargest(n, columns, keep=keep)
+        elif order == "smallest":
+            top_df = context.current_df.nsmallest(n, columns, keep=keep)
+        else:
+            raise ValueError(f"Unsupported order: {order}")
+        
+        context.current_df = top_df
+        context.log(
+            "top_n",
+            f"Kept top {n} rows by {columns} ({order})",
+            len(top_df)
+        )
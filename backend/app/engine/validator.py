@@ -1,5 +1,14 @@
 import pandas as pd
 
+from app.config import settings
+from app.engine.coercion import coerce_filter_value, ValueCoercionError
+from app.engine.dag import ROOT_FRAME, WorkflowGraphError, branch_levels, branch_parent
+from app.engine.rules.group_agg import SUPPORTED_AGGREGATIONS
+from app.engine.rules.pivot import SUPPORTED_PIVOT_AGGREGATIONS
+
+
+FILTER_OPERATORS = ("=", "!=", ">", "<", ">=", "<=", "contains")
+
 
 class WorkflowValidationError(Exception):
     """Raised when workflow validation fails"""
@@ -9,61 +18,356 @@ class WorkflowValidationError(Exception):
 def validate_workflow(workflow: dict, df: pd.DataFrame):
     """Validate workflow against dataframe before execution"""
     
-    if "steps" not in workflow:
+    if "steps" not in workflow and "branches" not in workflow:
         raise WorkflowValidationError("Workflow must contain 'steps' array")
     
-    if not isinstance(workflow["steps"], list):
+    steps = workflow.get("steps", [])
+    if not isinstance(steps, list):
         raise WorkflowValidationError("'steps' must be an array")
     
-    if len(workflow["steps"]) == 0:
+    if len(steps) == 0 and not workflow.get("branches"):
         raise WorkflowValidationError("Workflow must contain at least one step")
     
-    columns = set(df.columns)
+    columns = _validate_steps(steps, set(df.columns), df)
+    
+    if "branches" in workflow:
+        _validate_branches(workflow["branches"], steps, columns, df)
+
+
+def _is_positive_int(value) -> bool:
+    """True for integers >= 1; bool is an int subclass but never a count"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+
+def _sheet_writes(steps: list):
+    """Fixed sheet names and split_by name prefixes written by steps"""
+    sheets, prefixes = set(), set()
+    for step in steps:
+        if not isinstance(step, dict):
+            continue
+        if step.get("type") == "split_by":
+            prefixes.add(str(step.get("target_sheet_prefix", "")))
+        elif step.get("target_sheet") is not None:
+            sheets.add(step["target_sheet"])
+    return sheets, prefixes
+
+
+def _check_sheet_collisions(name: str, steps: list, claims: list):
+    """
+    Reject a branch writing sheets another writer (top-level steps or
+    another branch) may write too
+    
+    Sibling branches run concurrently, so a shared sheet would be written
+    in scheduling order; split_by names are derived from the sheets that
+    already exist, so any overlap with its prefix makes them unstable.
+    """
+    sheets, prefixes = _sheet_writes(steps)
+    
+    for owner, other_sheets, other_prefixes in claims:
+        for sheet in sheets:
+            if sheet in other_sheets:
+                raise WorkflowValidationError(
+                    f"Branch '{name}': sheet '{sheet}' is also written by {owner}"
+                )
+            if any(sheet.startswith(other) for other in other_prefixes):
+                raise WorkflowValidationError(
+                    f"Branch '{name}': sheet '{sheet}' may collide with split_by sheets of {owner}"
+                )
+        
+        for prefix in prefixes:
+            if any(sheet.startswith(prefix) for sheet in other_sheets) or any(
+                prefix.startswith(other) or other.startswith(prefix) for other in other_prefixes
+            ):
+                raise WorkflowValidationError(
+                    f"Branch '{name}': split_by sheets (prefix '{prefix}') may collide with sheets of {owner}"
+                )
+    
+    claims.append((f"branch '{name}'", sheets, prefixes))
+
+
+def _validate_branches(branches, root_steps: list, root_columns: set, df: pd.DataFrame):
+    """Check the branch DAG, then each branch against its parent's columns"""
+    if not isinstance(branches, list) or len(branches) == 0:
+        raise WorkflowValidationError("'branches' must be a non-empty array")
+    
+    try:
+        levels = branch_levels(branches)
+    except WorkflowGraphError as e:
+        raise WorkflowValidationError(str(e))
+    
+    frame_columns = {ROOT_FRAME: root_columns}
+    claims = [("the top-level steps", *_sheet_writes(root_steps))]
     
-    for idx, step in enumerate(workflow["steps"]):
+    for level in levels:
+        for branch in level:
+            name = branch["name"]
+            steps = branch.get("steps")
+            if not isinstance(steps, list) or len(steps) == 0:
+                raise WorkflowValidationError(f"Branch '{name}': 'steps' must be a non-empty array")
+            
+            _check_sheet_collisions(name, steps, claims)
+            
+            frame_columns[name] = _validate_steps(
+                steps,
+                set(frame_columns[branch_parent(branch)]),
+                df,
+                prefix=f"Branch '{name}' "
+            )
+
+
+def _validate_steps(steps: list, columns: set, df: pd.DataFrame, prefix: str = "") -> set:
+    """Validate steps run on a frame with the given columns; return its columns after"""
+    for idx, step in enumerate(steps):
         if "type" not in step:
-            raise WorkflowValidationError(f"Step {idx}: missing 'type' field")
+            raise WorkflowValidationError(f"{prefix}Step {idx}: missing 'type' field")
         
         step_type = step["type"]
         
         # Validate filter rule
         if step_type == "filter":
             if "column" not in step:
-                raise WorkflowValidationError(f"Step {idx}: filter requires 'column'")
+                raise WorkflowValidationError(f"{prefix}Step {idx}: filter requires 'column'")
             
             if step["column"] not in columns:
                 raise WorkflowValidationError(
-                    f"Step {idx}: column '{step['column']}' does not exist in dataframe"
+                    f"{prefix}Step {idx}: column '{step['column']}' does not exist in dataframe"
                 )
             
             if "operator" not in step:
-                raise WorkflowValidationError(f"Step {idx}: filter requires 'operator'")
+                raise WorkflowValidationError(f"{prefix}Step {idx}: filter requires 'operator'")
             
             if "value" not in step:
-                raise WorkflowValidationError(f"Step {idx}: filter requires 'value'")
+                raise WorkflowValidationError(f"{prefix}Step {idx}: filter requires 'value'")
+            
+            if step["operator"] not in FILTER_OPERATORS:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: unsupported operator '{step['operator']}'"
+                )
+            
+            # Catch type mismatches now rather than mid-run (input columns only)
+            if step["column"] in df.columns:
+                try:
+                    coerce_filter_value(df[step["column"]], step["operator"], step["value"])
+                except ValueCoercionError as e:
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: value does not match type of column '{step['column']}': {str(e)}"
+                    )
         
         # Validate move rule
         elif step_type == "move":
             if "target_sheet" not in step:
-                raise WorkflowValidationError(f"Step {idx}: move requires 'target_sheet'")
+                raise WorkflowValidationError(f"{prefix}Step {idx}: move requires 'target_sheet'")
         
         # Validate group_sum rule
         elif step_type == "group_sum":
             if "group_by" not in step:
-                raise WorkflowValidationError(f"Step {idx}: group_sum requires 'group_by'")
+                raise WorkflowValidationError(f"{prefix}Step {idx}: group_sum requires 'group_by'")
             
             if "field" not in step:
-                raise WorkflowValidationError(f"Step {idx}: group_sum requires 'field'")
+                raise WorkflowValidationError(f"{prefix}Step {idx}: group_sum requires 'field'")
             
             if "target_sheet" not in step:
-                raise WorkflowValidationError(f"Step {idx}: group_sum requires 'target_sheet'")
+                raise WorkflowValidationError(f"{prefix}Step {idx}: group_sum requires 'target_sheet'")
             
             if step["group_by"] not in columns:
                 raise WorkflowValidationError(
-                    f"Step {idx}: column '{step['group_by']}' does not exist"
+                    f"{prefix}Step {idx}: column '{step['group_by']}' does not exist"
                 )
             
             if step["field"] not in columns:
                 raise WorkflowValidationError(
-                    f"Step {idx}: column '{step['field']}' does not exist"
+                    f"{prefix}Step {idx}: column '{step['field']}' does not exist"
+                )
+        
+        # Validate lookup rule
+        elif step_type in ("lookup", "join"):
+            for field in ("reference_file_id", "on", "columns"):
+                if field not in step:
+                    raise WorkflowValidationError(f"{prefix}Step {idx}: {step_type} requires '{field}'")
+            
+            if step["on"] not in columns:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: column '{step['on']}' does not exist"
+                )
+            
+            # Same fallback as the rule: a missing or empty key means 'on'
+            reference_key = step.get("reference_key") or step["on"]
+            if isinstance(reference_key, (list, dict, bool)):
+                raise WorkflowValidationError(f"{prefix}Step {idx}: 'reference_key' must be a single column name")
+            
+            if not isinstance(step["columns"], list) or len(step["columns"]) == 0:
+                raise WorkflowValidationError(f"{prefix}Step {idx}: 'columns' must be a non-empty array")
+            
+            # The key becomes the reference table's index, not a column
+            if reference_key in step["columns"]:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: 'columns' cannot include the lookup key '{reference_key}'"
+                )
+            
+            existing = [c for c in step["columns"] if c in columns]
+            if existing:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: columns {existing} already exist in dataframe"
+                )
+            
+            if step.get("how", "left") not in ("left", "inner"):
+                raise WorkflowValidationError(f"{prefix}Step {idx}: 'how' must be 'left' or 'inner'")
+            
+            # Looked-up columns are available to later steps
+            columns.update(step["columns"])
+        
+        # Validate group_agg rule
+        elif step_type == "group_agg":
+            for field in ("group_by", "aggregations", "target_sheet"):
+                if field not in step:
+                    raise WorkflowValidationError(f"{prefix}Step {idx}: group_agg requires '{field}'")
+            
+            keys = [step["group_by"]] if isinstance(step["group_by"], str) else step["group_by"]
+            if not isinstance(keys, list) or len(keys) == 0:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: 'group_by' must be a column or a non-empty array"
+                )
+            
+            for column in keys:
+                if column not in columns:
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: column '{column}' does not exist"
+                    )
+            
+            if not isinstance(step["aggregations"], list) or len(step["aggregations"]) == 0:
+                raise WorkflowValidationError(f"{prefix}Step {idx}: 'aggregations' must be a non-empty array")
+            
+            output_names = set()
+            for agg in step["aggregations"]:
+                if not isinstance(agg, dict) or "field" not in agg or "agg" not in agg:
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: each aggregation requires 'field' and 'agg'"
+                    )
+                
+                if agg["field"] not in columns:
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: column '{agg['field']}' does not exist"
+                    )
+                
+                if agg["agg"] not in SUPPORTED_AGGREGATIONS:
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: unsupported aggregation '{agg['agg']}'"
+                    )
+                
+                name = agg.get("as") or f"{agg['field']}_{agg['agg']}"
+                if name in output_names or name in keys:
+                    raise WorkflowValidationError(f"{prefix}Step {idx}: duplicate output column '{name}'")
+                output_names.add(name)
+        
+        # Validate split_by rule
+        elif step_type == "split_by":
+            if "column" not in step:
+                raise WorkflowValidationError(f"{prefix}Step {idx}: split_by requires 'column'")
+            
+            if step["column"] not in columns:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: column '{step['column']}' does not exist"
+                )
+            
+            max_partitions = step.get("max_partitions", settings.SPLIT_MAX_PARTITIONS)
+            if not _is_positive_int(max_partitions):
+                raise WorkflowValidationError(f"{prefix}Step {idx}: 'max_partitions' must be a positive integer")
+            
+            if max_partitions > settings.SPLIT_MAX_PARTITIONS:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: 'max_partitions' cannot exceed {settings.SPLIT_MAX_PARTITIONS}"
                 )
+        
+        # Validate sort and top_n rules
+        elif step_type in ("sort", "top_n"):
+            if "by" not in step:
+                raise WorkflowValidationError(f"{prefix}Step {idx}: {step_type} requires 'by'")
+            
+            by = [step["by"]] if isinstance(step["by"], str) else step["by"]
+            if not isinstance(by, list) or len(by) == 0:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: 'by' must be a column or a non-empty array"
+                )
+            
+            for column in by:
+                if column not in columns:
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: column '{column}' does not exist"
+                    )
+            
+            if step_type == "sort":
+                ascending = step.get("ascending", True)
+                if not isinstance(ascending, bool) and not (
+                    isinstance(ascending, list) and len(ascending) == len(by)
+                ):
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: 'ascending' must be a boolean or one boolean per column"
+                    )
+            
+            else:
+                if not _is_positive_int(step.get("n")):
+                    raise WorkflowValidationError(f"{prefix}Step {idx}: top_n requires a positive integer 'n'")
+                
+                if step.get("order", "largest") not in ("largest", "smallest"):
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: 'order' must be 'largest' or 'smallest'"
+                    )
+                
+                if step.get("keep", "first") not in ("first", "last", "all"):
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: 'keep' must be 'first', 'last' or 'all'"
+                    )
+                
+                # Partial selection needs orderable numbers (input columns only)
+                for column in by:
+                    if column in df.columns and not pd.api.types.is_numeric_dtype(df[column]):
+                        raise WorkflowValidationError(
+                            f"{prefix}Step {idx}: top_n column '{column}' must be numeric"
+                        )
+        
+        # Validate dedupe rule
+        elif step_type == "dedupe":
+            subset = step.get("columns")
+            if subset is not None:
+                if not isinstance(subset, list):
+                    raise WorkflowValidationError(f"{prefix}Step {idx}: 'columns' must be an array")
+                
+                for column in subset:
+                    if column not in columns:
+                        raise WorkflowValidationError(
+                            f"{prefix}Step {idx}: column '{column}' does not exist"
+                        )
+            
+            if step.get("keep", "first") not in ("first", "last"):
+                raise WorkflowValidationError(f"{prefix}Step {idx}: 'keep' must be 'first' or 'last'")
+        
+        # Validate pivot rule
+        elif step_type == "pivot":
+            for field in ("index", "columns", "values", "target_sheet"):
+                if field not in step:
+                    raise WorkflowValidationError(f"{prefix}Step {idx}: pivot requires '{field}'")
+            
+            keys = [step["index"]] if isinstance(step["index"], str) else step["index"]
+            if not isinstance(keys, list) or len(keys) == 0:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: 'index' must be a column or a non-empty array"
+                )
+            
+            for column in keys + [step["columns"], step["values"]]:
+                if column not in columns:
+                    raise WorkflowValidationError(
+                        f"{prefix}Step {idx}: column '{column}' does not exist"
+                    )
+            
+            if step.get("aggfunc", "sum") not in SUPPORTED_PIVOT_AGGREGATIONS:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: unsupported aggregation '{step.get('aggfunc')}'"
+                )
+            
+            max_columns = step.get("max_columns", settings.PIVOT_MAX_COLUMNS)
+            if not _is_positive_int(max_columns) or max_columns > settings.PIVOT_MAX_COLUMNS:
+                raise WorkflowValidationError(
+                    f"{prefix}Step {idx}: 'max_columns' must be between 1 and {settings.PIVOT_MAX_COLUMNS}"
+                )
+    
+    return columns
@@ -2,11 +2,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.database import Base, engine as db_engine
+from app.pagination import NEXT_CURSOR_HEADER
 from app.routes import auth, workflows, files, executions
 
-# Create database tables
-Base.metadata.create_all(bind=db_engine)
+# Schema is managed by Alembic (alembic upgrade head), not at import time.
+# Heavy modules (pandas, engine, Celery) are imported by the routes that use them.
 
 app = FastAPI(
     title="Macro Builder API",
@@ -21,6 +21,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Health check
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey, Text, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -60,6 +60,10 @@ class Membership(Base):
 
 class Workflow(Base):
     __tablename__ = "workflows"
+    __table_args__ = (
+        # Paginated listing: WHERE company_id, is_active ORDER BY created_at, id
+        Index("ix_workflows_company_active_created", "company_id", "is_active", "created_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -76,6 +80,9 @@ class Workflow(Base):
 
 class WorkflowVersion(Base):
     __tablename__ = "workflow_versions"
+    __table_args__ = (
+        Index("ix_workflow_versions_workflow_number", "workflow_id", "version_number"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     workflow_id = Column(UUID(as_uuid=True), ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -91,14 +98,27 @@ class WorkflowVersion(Base):
 
 class Execution(Base):
     __tablename__ = "executions"
+    __table_args__ = (
+        Index("ix_executions_company_created", "company_id", "created_at", "id"),
+        # History search and stats
+        Index("ix_executions_company_status_started", "company_id", "status", "started_at"),
+        Index("ix_executions_version_started", "workflow_version_id", "started_at"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True)
     workflow_version_id = Column(UUID(as_uuid=True), ForeignKey("workflow_versions.id"), nullable=False)
-    status = Column(String(50), default="pending")  # pending, running, success, failed
+    status = Column(String(50), default="pending")  # pending, running, success, failed, cancelled
     started_at = Column(DateTime)
     finished_at = Column(DateTime)
     error_message = Column(Text)
+    input_rows = Column(Integer)  # feeds the cost estimator
+    created_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        server_default=text("timezone('utc', now())"),
+        nullable=False
+    )
     
     # Relationships
     workflow_version = relationship("WorkflowVersion", back_populates="executions")
@@ -108,6 +128,9 @@ class Execution(Base):
 
 class ExecutionLog(Base):
     __tablename__ = "execution_logs"
+    __table_args__ = (
+        Index("ix_execution_logs_execution_step", "execution_id", "step_index", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     execution_id = Column(UUID(as_uuid=True), ForeignKey("executions.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -129,8 +152,9 @@ class File(Base):
     original_filename = Column(String(255), nullable=False)
     storage_path = Column(Text, nullable=False)
     file_type = Column(String(50), nullable=False)  # input, output
+    content_hash = Column(String(64))  # SHA-256, download ETag
     created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # purged by maintenance task
 
 
 class ExecutionFile(Base):
@@ -138,7 +162,7 @@ class ExecutionFile(Base):
 
     execution_id = Column(UUID(as_uuid=True), ForeignKey("executions.id", ondelete="CASCADE"), primary_key=True)
     file_id = Column(UUID(as_uuid=True), ForeignKey("files.id", ondelete="CASCADE"), primary_key=True)
-    role = Column(String(50), nullable=False)  # input, output
+    role = Column(String(50), nullable=False)  # input, output, reference
     
     # Relationships
     execution = relationship("Execution", back_populates="files")
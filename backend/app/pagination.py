@@ -0,0 +1,125 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Response header carrying the cursor of the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Opaque cursor holding the sort key of the last row of a page"""
+    plain = [
+        value.isoformat() if isinstance(value, datetime)
+        else str(value) if isinstance(value, uuid.UUID)
+        else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(plain).encode()).decode()
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    """Sort key from a cursor, typed like the columns it is compared with"""
+    try:
+        plain = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(plain, list) or len(plain) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+
+        values = []
+        for column, value in zip(columns, plain):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                values.append(datetime.fromisoformat(value))
+            elif python_type is uuid.UUID:
+                values.append(uuid.UUID(value))
+            else:
+                values.append(python_type(value))
+        return values
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _keyset(query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool):
+    """Restrict a Query or select() to the page after the cursor, plus one row"""
+    key = tuple_(*columns)
+
+    if cursor:
+        values = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < values if descending else key > values)
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def _page(rows: List, columns: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in columns])
+
+
+def paginate(
+    query,
+    columns: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True
+) -> Tuple[List, Optional[str]]:
+    """
+    Fetch one page of a query with keyset pagination
+
+    Rows are ordered by the given columns, which must form a unique key and
+    match an index prefix after the query's equality filters. The next page
+    starts strictly after the last row seen, so each page costs one index
+    range scan no matter how deep it is.
+
+    Args:
+        query: Filtered ORM query (entities or projected columns)
+        columns: Sort key columns
+        cursor: Cursor returned with the previous page, or None
+        limit: Page size
+        descending: Newest first
+
+    Returns:
+        Rows of the page and the cursor of the next page (None when last)
+    """
+    rows = _keyset(query, columns, cursor, limit, descending).all()
+    return _page(rows, columns, limit)
+
+
+async def paginate_async(
+    db,
+    statement,
+    columns: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True,
+    scalars: bool = True
+) -> Tuple[List, Optional[str]]:
+    """
+    paginate() for a select() run on an AsyncSession
+
+    scalars=True returns ORM entities; False returns rows (column projections).
+    """
+    result = await db.execute(_keyset(statement, columns, cursor, limit, descending))
+    rows = result.scalars().all() if scalars else result.all()
+    return _page(list(rows), columns, limit)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """Expose the next page cursor to the client"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1 @@
+# Readers package
@@ -0,0 +1,49 @@
+import importlib.util
+from abc import ABC, abstractmethod
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+
+class Reader(ABC):
+    """Base class for input file readers"""
+    
+    # Registry name
+    name: str = ""
+    # Lower-case file extensions this reader understands
+    extensions: Tuple[str, ...] = ()
+    # Python modules that must be importable
+    requires: Tuple[str, ...] = ()
+    
+    @classmethod
+    def is_available(cls) -> bool:
+        """Capability check: are the backend's dependencies installed?"""
+        return all(importlib.util.find_spec(module) is not None for module in cls.requires)
+    
+    def can_read(self, path: str, sheet: Optional[str] = None) -> bool:
+        """Whether this reader can serve the given file (and sheet)"""
+        return path.lower().endswith(self.extensions)
+    
+    @abstractmethod
+    def read(
+        self,
+        path: str,
+        nrows: Optional[int] = None,
+        sheet: Optional[str] = None,
+        should_cancel: Optional[Callable[[], bool]] = None,
+        **options
+    ) -> pd.DataFrame:
+        """
+        Read one sheet (the first by default) into a DataFrame
+        
+        Readers that can stop mid-parse poll should_cancel while reading.
+        """
+        pass
+    
+    def columns(self, path: str, sheet: Optional[str] = None) -> List[str]:
+        """Column names, reading as little as possible"""
+        return self.read(path, nrows=0, sheet=sheet).columns.tolist()
+    
+    def sheets(self, path: str) -> List[str]:
+        """Sheet names; empty for single-table formats"""
+        return []
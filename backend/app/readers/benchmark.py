@@ -0,0 +1,59 @@
+"""
+Micro-benchmark of the reader backends on this machine
+
+Usage:
+    python -m app.readers.benchmark path/to/file.xlsx [--repeat 3]
+"""
+import argparse
+import time
+
+from app.readers.factory import available_readers, get_reader, select_reader
+
+
+def benchmark(path: str, repeat: int = 3) -> dict:
+    """Best-of-N read time per available backend, in seconds"""
+    timings = {}
+    
+    for name, available in available_readers().items():
+        reader = get_reader(name)
+        if not available or not reader.can_read(path):
+            continue
+        
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            reader.read(path)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        
+        timings[name] = best
+    
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark input file readers")
+    parser.add_argument("path", help="Input file to read")
+    parser.add_argument("--repeat", type=int, default=3, help="Reads per backend (best is kept)")
+    args = parser.parse_args()
+    
+    print("Capabilities:")
+    for name, available in available_readers().items():
+        print(f"  {name:<10} {'available' if available else 'not installed'}")
+    
+    timings = benchmark(args.path, args.repeat)
+    
+    print(f"\nRead times for {args.path} (best of {args.repeat}):")
+    for name, seconds in sorted(timings.items(), key=lambda item: item[1]):
+        print(f"  {name:<10} {seconds:8.3f}s")
+    
+    if timings:
+        fastest = min(timings, key=timings.get)
+        selected = select_reader(args.path).name
+        print(f"\nFastest: {fastest}. Selected automatically: {selected}.")
+        if fastest != selected:
+            print("Adjust READER_BACKENDS or READER_PREFERENCE to prefer the fastest backend.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import tempfile
+import warnings
+from typing import List, Optional
+
+import pandas as pd
+
+from app.readers.base import Reader
+
+
+class ExcelReader(Reader):
+    """Workbook reader backed by a pandas Excel engine"""
+    
+    engine: str = ""
+    
+    def read(self, path, nrows=None, sheet=None, should_cancel=None, **options):
+        # Only the requested sheet is parsed
+        return pd.read_excel(
+            path,
+            engine=self.engine,
+            sheet_name=sheet if sheet is not None else 0,
+            nrows=nrows,
+            **options
+        )
+    
+    def sheets(self, path):
+        with pd.ExcelFile(path, engine=self.engine) as workbook:
+            return list(workbook.sheet_names)
+
+
+class CalamineReader(ExcelReader):
+    """Rust-based reader for .xlsx and .xls, several times faster than openpyxl"""
+    
+    name = "calamine"
+    extensions = (".xlsx", ".xlsm", ".xls")
+    requires = ("python_calamine",)
+    
+    engine = "calamine"
+
+
+class OpenpyxlReader(ExcelReader):
+    """Pure-Python .xlsx reader, opened in read-only streaming mode"""
+    
+    name = "openpyxl"
+    extensions = (".xlsx", ".xlsm")
+    requires = ("openpyxl",)
+    
+    # pandas opens the workbook with read_only=True, data_only=True
+    engine = "openpyxl"
+
+
+class XlrdReader(ExcelReader):
+    """Reader for legacy .xls workbooks"""
+    
+    name = "xlrd"
+    extensions = (".xls",)
+    requires = ("xlrd",)
+    
+    engine = "xlrd"
+
+
+# Sidecar schema metadata holding the header values as parsed
+SIDECAR_COLUMNS_KEY = b"dataweaver.columns"
+
+
+def columnar_sidecar_path(path: str, sheet: Optional[str] = None) -> str:
+    """Path of the columnar copy of one sheet, kept next to the input file"""
+    if sheet is None:
+        return f"{path}.parquet"
+    digest = hashlib.sha1(str(sheet).encode()).hexdigest()[:12]
+    return f"{path}.{digest}.parquet"
+
+
+class ColumnarCacheReader(Reader):
+    """
+    Reads the Parquet sidecar written after a file was first parsed
+    
+    Only used while the sidecar is newer than the file it was built from.
+    """
+    
+    name = "columnar"
+    extensions = (".xlsx", ".xlsm", ".xls", ".csv", ".tsv")
+    requires = ("pyarrow",)
+    
+    def can_read(self, path, sheet=None):
+        sidecar = columnar_sidecar_path(path, sheet)
+        return (
+            super().can_read(path)
+            and os.path.exists(sidecar)
+            and os.path.getmtime(sidecar) >= os.path.getmtime(path)
+        )
+    
+    def read(self, path, nrows=None, sheet=None, should_cancel=None, **options):
+        sidecar = columnar_sidecar_path(path, sheet)
+        df = pd.read_parquet(sidecar, **options)
+        
+        names = self._column_names(sidecar)
+        if names is not None and len(names) == len(df.columns):
+            df.columns = names
+        return df if nrows is None else df.head(nrows)
+    
+    def columns(self, path, sheet=None) -> List[str]:
+        import pyarrow.parquet as pq
+        
+        # Schema only, no data pages
+        sidecar = columnar_sidecar_path(path, sheet)
+        names = self._column_names(sidecar)
+        if names is not None:
+            return names
+        names = pq.read_schema(sidecar).names
+        return [name for name in names if not name.startswith("__index_level_")]
+    
+    @staticmethod
+    def _column_names(sidecar: str) -> Optional[list]:
+        """Header values as first parsed (Parquet field names are strings)"""
+        import pyarrow.parquet as pq
+        
+        metadata = pq.read_schema(sidecar).metadata or {}
+        if SIDECAR_COLUMNS_KEY not in metadata:
+            return None
+        return json.loads(metadata[SIDECAR_COLUMNS_KEY])
+    
+    @staticmethod
+    def store(path: str, df: pd.DataFrame, sheet: Optional[str] = None) -> Optional[str]:
+        """
+        Write the sidecar atomically; returns None when Arrow cannot type the data
+        
+        The pandas metadata is dropped, so the sidecar does not remember the
+        dtypes of the frame it came from: readers get numpy dtypes by default
+        and Arrow dtypes only when they ask for dtype_backend="pyarrow",
+        whichever mode wrote it. Header values are kept in their own
+        metadata, so a 2023 header reads back as int on every read. Frames
+        with other header types (e.g. dates) get no sidecar.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        names = df.columns.tolist()
+        if not all(isinstance(name, (str, int, float)) for name in names):
+            return None
+        
+        sidecar = columnar_sidecar_path(path, sheet)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(sidecar) or ".", suffix=".tmp")
+        os.close(fd)
+        
+        try:
+            with warnings.catch_warnings():
+                # Mixed header types are stringified here and restored on read
+                warnings.simplefilter("ignore", UserWarning)
+                table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({SIDECAR_COLUMNS_KEY: json.dumps(names)})
+            pq.write_table(table, tmp_path, compression="lz4")
+            os.replace(tmp_path, sidecar)
+        except Exception:
+            # Mixed-type object columns have no Arrow type
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        
+        return sidecar
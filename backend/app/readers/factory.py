@@ -0,0 +1,114 @@
+import os
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from app.config import settings
+from app.readers.base import Reader
+from app.readers.excel import CalamineReader, OpenpyxlReader, XlrdReader, ColumnarCacheReader
+from app.readers.delimited import CsvArrowReader, CsvReader
+
+
+READER_REGISTRY = {
+    "columnar": ColumnarCacheReader,
+    "calamine": CalamineReader,
+    "openpyxl": OpenpyxlReader,
+    "xlrd": XlrdReader,
+    "csv_arrow": CsvArrowReader,
+    "csv": CsvReader,
+}
+
+# Fastest first; the first available reader that can serve the file wins
+READER_PREFERENCE = {
+    ".xlsx": ["columnar", "calamine", "openpyxl"],
+    ".xlsm": ["columnar", "calamine", "openpyxl"],
+    ".xls": ["columnar", "calamine", "xlrd"],
+    ".csv": ["columnar", "csv_arrow", "csv"],
+    ".tsv": ["columnar", "csv_arrow", "csv"],
+}
+
+# Formats holding a single table, no sheet selection
+DELIMITED_EXTENSIONS = (".csv", ".tsv")
+
+SUPPORTED_EXTENSIONS = tuple(READER_PREFERENCE.keys())
+
+
+def get_reader(name: str) -> Reader:
+    """Factory method to get reader instance by name"""
+    if name not in READER_REGISTRY:
+        raise ValueError(f"Unknown reader: {name}")
+    
+    return READER_REGISTRY[name]()
+
+
+def available_readers() -> Dict[str, bool]:
+    """Capability check for every registered reader"""
+    return {name: reader.is_available() for name, reader in READER_REGISTRY.items()}
+
+
+def select_reader(path: str, exclude: tuple = (), sheet: Optional[str] = None) -> Reader:
+    """Pick the fastest available reader for a file (and sheet)"""
+    extension = os.path.splitext(path)[1].lower()
+    
+    if extension not in READER_PREFERENCE:
+        raise ValueError(f"Unsupported file type: {extension}")
+    
+    for name in READER_PREFERENCE[extension]:
+        if name in exclude or name not in settings.READER_BACKENDS:
+            continue
+        reader = get_reader(name)
+        if reader.is_available() and reader.can_read(path, sheet):
+            return reader
+    
+    raise ValueError(f"No reader available for {extension} files")
+
+
+def read_dataframe(
+    path: str,
+    nrows: Optional[int] = None,
+    sheet: Optional[str] = None,
+    should_cancel: Optional[Callable[[], bool]] = None,
+    **options
+) -> pd.DataFrame:
+    """
+    Read an input file with the fastest available reader
+    
+    Only the requested sheet (the first by default) is parsed. After a full
+    parse by a slow reader, a columnar sidecar is written for that sheet so
+    later reads of the same file (by any worker) skip Excel/CSV parsing.
+    should_cancel is polled while parsing by readers that support it.
+    """
+    sheet = _effective_sheet(path, sheet)
+    reader = select_reader(path, sheet=sheet)
+    df = reader.read(path, nrows=nrows, sheet=sheet, should_cancel=should_cancel, **options)
+    
+    if (
+        nrows is None
+        and reader.name != "columnar"
+        and "columnar" in settings.READER_BACKENDS
+        and ColumnarCacheReader.is_available()
+    ):
+        ColumnarCacheReader.store(path, df, sheet)
+    
+    return df
+
+
+def read_columns(path: str, sheet: Optional[str] = None):
+    """Column names of an input file (one sheet)"""
+    sheet = _effective_sheet(path, sheet)
+    return select_reader(path, sheet=sheet).columns(path, sheet)
+
+
+def list_sheets(path: str) -> List[str]:
+    """Sheet names of a workbook; empty for CSV/TSV"""
+    if path.lower().endswith(DELIMITED_EXTENSIONS):
+        return []
+    
+    # The columnar sidecar holds no workbook structure
+    return select_reader(path, exclude=("columnar",)).sheets(path)
+
+
+def _effective_sheet(path: str, sheet: Optional[str]) -> Optional[str]:
+    if sheet is not None and path.lower().endswith(DELIMITED_EXTENSIONS):
+        raise ValueError("CSV/TSV files have no sheets")
+    return sheet
@@ -0,0 +1,186 @@
+import os
+import re
+import zlib
+from typing import Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.config import settings
+
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+MEDIA_TYPES = {
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".xlsm": "application/vnd.ms-excel.sheet.macroEnabled.12",
+    ".xls": "application/vnd.ms-excel",
+    ".csv": "text/csv",
+    ".tsv": "text/tab-separated-values",
+}
+
+# Compressed on the fly when the client accepts gzip (xlsx is already zipped)
+COMPRESSIBLE_EXTENSIONS = (".csv", ".tsv")
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+def media_type_for(filename: str) -> str:
+    return MEDIA_TYPES.get(os.path.splitext(filename)[1].lower(), "application/octet-stream")
+
+
+def _content_disposition(filename: str) -> str:
+    return f"attachment; filename*=utf-8''{quote(filename)}"
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range into inclusive (start, end)
+
+    Returns None for headers this server ignores (multiple ranges, other
+    units), so the full file is sent. Raises ValueError when unsatisfiable.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        raise ValueError("empty file")
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def _read_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _gzip(path: str) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+    with open(path, "rb") as f:
+        while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+    yield compressor.flush()
+
+
+def _etag_matches(header: Optional[str], *etags: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return any(etag in candidates for etag in etags)
+
+
+def json_response(body: bytes, response: Optional[Response] = None) -> Response:
+    """
+    Response for a pre-serialised JSON body
+
+    FastAPI drops the headers of the injected response when a route returns
+    its own, so those (e.g. the next page cursor) are carried over.
+    """
+    result = Response(content=body, media_type="application/json")
+    if response is not None:
+        for name, value in response.headers.items():
+            if name not in ("content-length", "content-type"):
+                result.headers.append(name, value)
+    return result
+
+
+def file_download(request: Request, path: str, filename: str, content_hash: str) -> Response:
+    """
+    Serve a stored file with validators, byte ranges and optional gzip
+
+    Stored files never change under the same id, so the content hash is a
+    strong ETag and clients may cache until the file expires:
+
+    - If-None-Match with the current ETag: 304, no body
+    - Range (single range, honoured only if If-Range still matches): 206
+    - Accept-Encoding gzip for CSV/TSV without Range: compressed stream
+    - otherwise the whole file
+
+    Args:
+        request: Incoming request (conditional and range headers)
+        path: Storage path of the file
+        filename: Name offered to the client
+        content_hash: SHA-256 of the file content
+
+    Returns:
+        Response for the download
+    """
+    etag = f'"{content_hash}"'
+    gzip_etag = f'"{content_hash}-gzip"'
+    media_type = media_type_for(filename)
+    compressible = filename.lower().endswith(COMPRESSIBLE_EXTENSIONS)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.FILE_EXPIRATION_HOURS * 3600}, immutable",
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": _content_disposition(filename),
+    }
+    if compressible:
+        headers["Vary"] = "Accept-Encoding"
+
+    if _etag_matches(request.headers.get("if-none-match"), etag, gzip_etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    size = os.path.getsize(path)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+
+        if byte_range is not None:
+            start, end = byte_range
+            return StreamingResponse(
+                _read_range(path, start, end),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{size}",
+                    "Content-Length": str(end - start + 1),
+                }
+            )
+
+    if compressible and "gzip" in request.headers.get("accept-encoding", "").lower():
+        # A different representation, so a different ETag
+        return StreamingResponse(
+            _gzip(path),
+            media_type=media_type,
+            headers={**headers, "ETag": gzip_etag, "Content-Encoding": "gzip"}
+        )
+
+    return FileResponse(path=path, media_type=media_type, headers=headers)
@@ -1,37 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import Float, cast, extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
-import pandas as pd
+from datetime import datetime, timedelta
+import os
 
-from app.database import get_db
-from app.models import User, Execution, ExecutionLog, WorkflowVersion, File as FileModel
-from app.auth import get_current_user
+from app.database import get_db, get_async_db
+from app.models import (
+    User, Company, Execution, ExecutionFile, ExecutionLog, Workflow, WorkflowVersion, File as FileModel
+)
+from app.auth import get_current_user, get_current_user_async, get_current_company, member_company_ids
 from app.schemas import (
     ExecutionCreate,
     ExecutionResponse,
+    ExecutionStatsResponse,
     ExecutionLogResponse,
+    ExecutionOutputResponse,
     PreviewRequest,
     PreviewResponse
 )
-from app.tasks.workflow_execution import execute_workflow_task
-from app.engine.engine import engine
+from app.engine.cost import estimate_execution, ExecutionRejected
+from app.engine.dag import referenced_file_ids
+from app.storage import file_content_hash, make_file_resolver
+from app.responses import file_download, json_response
+from app.serialization import models_to_json, preview_to_json
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate, paginate_async, set_next_cursor
 
 router = APIRouter(prefix="/executions", tags=["Executions"])
 
+EXECUTION_STATUSES = ("pending", "running", "success", "failed", "cancelled")
+
+# Stats window when no start is given
+STATS_DEFAULT_WINDOW_DAYS = 30
+
 
 @router.post("", response_model=ExecutionResponse, status_code=status.HTTP_201_CREATED)
 def create_execution(
     execution_data: ExecutionCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    company: Company = Depends(get_current_company)
 ):
     """Create and start a workflow execution"""
     
-    # Verify workflow version exists
-    version = db.query(WorkflowVersion).filter(
-        WorkflowVersion.id == execution_data.workflow_version_id
-    ).first()
+    # Celery and Redis clients load on first use, not at API startup
+    from redis.exceptions import RedisError
+    from app.tasks import scheduler
+    from app.tasks.routing import filter_selectivity_history, route_execution
+    
+    # Verify workflow version exists (and belongs to the company)
+    version = (
+        db.query(WorkflowVersion)
+        .join(Workflow, Workflow.id == WorkflowVersion.workflow_id)
+        .filter(
+            WorkflowVersion.id == execution_data.workflow_version_id,
+            Workflow.company_id == company.id
+        )
+        .first()
+    )
     
     if not version:
         raise HTTPException(
@@ -39,8 +67,11 @@ def create_execution(
             detail="Workflow version not found"
         )
     
-    # Verify file exists
-    file = db.query(FileModel).filter(FileModel.id == execution_data.file_id).first()
+    # Verify file exists (and belongs to the company)
+    file = db.query(FileModel).filter(
+        FileModel.id == execution_data.file_id,
+        FileModel.company_id == company.id
+    ).first()
     
     if not file:
         raise HTTPException(
@@ -48,36 +79,201 @@ def create_execution(
             detail="File not found"
         )
     
+    if not os.path.exists(file.storage_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found on disk"
+        )
+    
+    # Sheet to read: the request wins over the workflow's default
+    sheet = execution_data.sheet or version.rules_json.get("sheet")
+    
+    # Admission control: predict cost, reject what cannot succeed
+    try:
+        estimate = estimate_execution(
+            file.storage_path,
+            version.rules_json,
+            filter_selectivity_history(db, version),
+            sheet=sheet
+        )
+    except ExecutionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Execution rejected: {str(e)}"
+        )
+    
     # Create execution record
     execution = Execution(
-        company_id="temp-company-id",  # TODO: Get from user context
+        company_id=company.id,
         workflow_version_id=execution_data.workflow_version_id,
         status="pending"
     )
     
     db.add(execution)
+    db.flush()
+    
+    # Link the input and lookup references so the expired-file purge keeps
+    # them while the execution is in flight
+    db.add(ExecutionFile(execution_id=execution.id, file_id=file.id, role="input"))
+    
+    reference_ids = []
+    for file_id in referenced_file_ids(version.rules_json):
+        try:
+            reference_ids.append(UUID(file_id))
+        except ValueError:
+            pass  # reported by the lookup step when it runs
+    
+    if reference_ids:
+        references = db.query(FileModel.id).filter(
+            FileModel.id.in_(reference_ids),
+            FileModel.company_id == company.id
+        )
+        for (reference_id,) in references:
+            db.add(ExecutionFile(execution_id=execution.id, file_id=reference_id, role="reference"))
     db.commit()
     db.refresh(execution)
     
-    # Dispatch Celery task
-    execute_workflow_task.delay(
-        str(execution.id),
-        str(execution_data.workflow_version_id),
-        str(execution_data.file_id)
-    )
+    # Queue for the tenant; dispatched to Celery (routed by estimate) within its quota
+    try:
+        scheduler.submit(
+            company_id=str(company.id),
+            plan=company.plan,
+            execution_id=str(execution.id),
+            args=[
+                str(execution.id),
+                str(execution_data.workflow_version_id),
+                str(execution_data.file_id),
+                estimate["engine_mode"],
+                sheet
+            ],
+            options=route_execution(estimate, company.plan)
+        )
+    except RedisError:
+        # Not queued (Redis down or scheduler lock timed out): nothing will run it
+        execution.status = "failed"
+        execution.finished_at = datetime.utcnow()
+        execution.error_message = "Execution queue unavailable"
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Execution queue unavailable, please retry"
+        )
     
     return execution
 
 
-@router.get("/{execution_id}", response_model=ExecutionResponse)
-def get_execution(
-    execution_id: str,
+@router.get("", response_model=List[ExecutionResponse])
+def list_executions(
+    response: Response,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    workflow_version_id: Optional[UUID] = None,
+    started_after: Optional[datetime] = None,
+    started_before: Optional[datetime] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    company: Company = Depends(get_current_company)
+):
+    """
+    Search executions for current company, newest first (one page)
+    
+    Without a time range, pages follow creation order. With one, they
+    follow started_at, so the (company_id, status, started_at) and
+    (workflow_version_id, started_at) indexes serve filter and order.
+    """
+    
+    if status_filter is not None and status_filter not in EXECUTION_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid status '{status_filter}'. Must be one of: {', '.join(EXECUTION_STATUSES)}"
+        )
+    
+    query = db.query(Execution).filter(Execution.company_id == company.id)
+    
+    if status_filter is not None:
+        query = query.filter(Execution.status == status_filter)
+    if workflow_version_id is not None:
+        query = query.filter(Execution.workflow_version_id == workflow_version_id)
+    
+    if started_after is None and started_before is None:
+        sort_key = [Execution.created_at, Execution.id]
+    else:
+        if started_after is not None:
+            query = query.filter(Execution.started_at >= started_after)
+        if started_before is not None:
+            query = query.filter(Execution.started_at < started_before)
+        sort_key = [Execution.started_at, Execution.id]
+    
+    executions, next_cursor = paginate(query, sort_key, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    
+    return json_response(models_to_json(ExecutionResponse, executions), response)
+
+
+@router.get("/stats", response_model=List[ExecutionStatsResponse])
+def get_execution_stats(
+    started_after: Optional[datetime] = None,
+    started_before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    company: Company = Depends(get_current_company)
+):
+    """
+    Execution counts, duration percentiles and failure rate per workflow
+    
+    Aggregated by the database in one grouped query; no rows are loaded.
+    Defaults to the last STATS_DEFAULT_WINDOW_DAYS days.
+    """
+    
+    if started_after is None:
+        started_after = datetime.utcnow() - timedelta(days=STATS_DEFAULT_WINDOW_DAYS)
+    
+    duration = extract("epoch", Execution.finished_at - Execution.started_at)
+    succeeded = func.count(Execution.id).filter(Execution.status == "success")
+    failed = func.count(Execution.id).filter(Execution.status == "failed")
+    
+    query = (
+        db.query(
+            Workflow.id.label("workflow_id"),
+            Workflow.name.label("workflow_name"),
+            func.count(Execution.id).label("executions"),
+            succeeded.label("succeeded"),
+            failed.label("failed"),
+            (cast(failed, Float) / func.nullif(succeeded + failed, 0)).label("failure_rate"),
+            func.percentile_cont(0.5).within_group(duration).label("p50_duration_seconds"),
+            func.percentile_cont(0.95).within_group(duration).label("p95_duration_seconds")
+        )
+        .join(WorkflowVersion, WorkflowVersion.id == Execution.workflow_version_id)
+        .join(Workflow, Workflow.id == WorkflowVersion.workflow_id)
+        .filter(
+            Execution.company_id == company.id,
+            Execution.started_at >= started_after
+        )
+    )
+    
+    if started_before is not None:
+        query = query.filter(Execution.started_at < started_before)
+    
+    rows = query.group_by(Workflow.id, Workflow.name).order_by(Workflow.name).all()
+    return json_response(models_to_json(ExecutionStatsResponse, rows))
+
+
+@router.get("/{execution_id}", response_model=ExecutionResponse)
+async def get_execution(
+    execution_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """Get execution status"""
     
-    execution = db.query(Execution).filter(Execution.id == execution_id).first()
+    # Polled by clients: one query, on the event loop
+    execution = await db.scalar(
+        select(Execution).where(
+            Execution.id == execution_id,
+            Execution.company_id.in_(member_company_ids(current_user))
+        )
+    )
     
     if not execution:
         raise HTTPException(
@@ -85,89 +281,207 @@ def get_execution(
             detail="Execution not found"
         )
     
-    # TODO: Check company_id authorization
-    
     return execution
 
 
 @router.get("/{execution_id}/logs", response_model=List[ExecutionLogResponse])
-def get_execution_logs(
-    execution_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_execution_logs(
+    execution_id: UUID,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    """Get execution logs"""
+    """Get execution logs in step order (one page)"""
+    
+    execution = await db.scalar(
+        select(Execution.id).where(
+            Execution.id == execution_id,
+            Execution.company_id.in_(member_company_ids(current_user))
+        )
+    )
+    
+    if not execution:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Execution not found"
+        )
+    
+    statement = select(ExecutionLog).where(ExecutionLog.execution_id == execution_id)
     
-    logs = (
-        db.query(ExecutionLog)
-        .filter(ExecutionLog.execution_id == execution_id)
-        .order_by(ExecutionLog.step_index)
-        .all()
+    logs, next_cursor = await paginate_async(
+        db,
+        statement,
+        [ExecutionLog.step_index, ExecutionLog.id],
+        cursor,
+        limit,
+        descending=False
     )
+    set_next_cursor(response, next_cursor)
     
-    return logs
+    return json_response(models_to_json(ExecutionLogResponse, logs), response)
 
 
-@router.get("/{execution_id}/output")
-async def get_execution_output(
-    execution_id: str,
+@router.post("/{execution_id}/cancel", response_model=ExecutionResponse, status_code=status.HTTP_202_ACCEPTED)
+def cancel_execution(
+    execution_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Download execution output file"""
+    """
+    Cancel a pending or running execution
+    
+    A job still queued for its company is removed and cancelled at once.
+    A dispatched one is flagged: the worker stops at its next check (CSV
+    parsing, step or output sheet) and records the status "cancelled".
+    """
+    
+    # Redis client loads on first use, not at API startup
+    from redis.exceptions import RedisError
+    from app.tasks import scheduler
+    
+    execution = db.query(Execution).filter(
+        Execution.id == execution_id,
+        Execution.company_id.in_(member_company_ids(current_user))
+    ).first()
+    
+    if not execution:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Execution not found"
+        )
+    
+    if execution.status not in ("pending", "running"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Execution already {execution.status}"
+        )
+    
+    try:
+        dequeued = scheduler.cancel(str(execution.company_id), str(execution.id))
+    except RedisError:
+        # Neither removed nor flagged: the execution carries on
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Execution queue unavailable, please retry"
+        )
     
-    from app.models import ExecutionFile
+    if dequeued:
+        # Never dispatched: no worker will touch it
+        execution.status = "cancelled"
+        execution.finished_at = datetime.utcnow()
+        execution.error_message = "Cancelled by user"
+        db.commit()
+        db.refresh(execution)
     
-    # Get output file
-    exec_file = (
-        db.query(ExecutionFile)
+    return execution
+
+
+def _output_files(db: Session, execution_id: UUID, current_user: User):
+    """Output files of an execution, with company authorization"""
+    return (
+        db.query(FileModel)
+        .join(ExecutionFile, ExecutionFile.file_id == FileModel.id)
         .filter(
             ExecutionFile.execution_id == execution_id,
-            ExecutionFile.role == "output"
+            ExecutionFile.role == "output",
+            FileModel.company_id.in_(member_company_ids(current_user))
         )
-        .first()
+        .order_by(FileModel.original_filename, FileModel.id)
     )
+
+
+@router.get("/{execution_id}/outputs", response_model=List[ExecutionOutputResponse])
+def list_execution_outputs(
+    execution_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List execution output files (one per output sheet)"""
+    
+    execution = db.query(Execution.id).filter(
+        Execution.id == execution_id,
+        Execution.company_id.in_(member_company_ids(current_user))
+    ).first()
     
-    if not exec_file:
+    if not execution:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Output file not found"
+            detail="Execution not found"
         )
     
-    file = db.query(FileModel).filter(FileModel.id == exec_file.file_id).first()
+    return [
+        ExecutionOutputResponse(file_id=file.id, filename=file.original_filename)
+        for file in _output_files(db, execution_id, current_user)
+    ]
+
+
+@router.get("/{execution_id}/output")
+def get_execution_output(
+    execution_id: UUID,
+    request: Request,
+    file_id: Optional[UUID] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Download an execution output file (supports If-None-Match and Range)
+    
+    file_id selects one of the outputs listed by /outputs; without it the
+    first output by filename is returned.
+    """
+    
+    # One query: execution -> output file, with company authorization
+    query = _output_files(db, execution_id, current_user)
+    if file_id is not None:
+        query = query.filter(FileModel.id == file_id)
+    file = query.first()
     
     if not file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="File record not found"
+            detail="Output file not found"
         )
     
-    from fastapi.responses import FileResponse
-    import os
-    
     if not os.path.exists(file.storage_path):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found on disk"
         )
     
-    return FileResponse(
-        path=file.storage_path,
-        filename=file.original_filename,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    return file_download(
+        request,
+        file.storage_path,
+        file.original_filename,
+        file.content_hash or file_content_hash(file.storage_path)
     )
 
 
 @router.post("/preview", response_model=PreviewResponse)
-async def preview_workflow(
+def preview_workflow(
     preview_data: PreviewRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    company: Company = Depends(get_current_company)
 ):
-    """Preview workflow execution without persisting results"""
+    """
+    Preview workflow execution without persisting results
+    
+    Runs in the threadpool (CPU-bound). The body is serialised straight from
+    the DataFrames; response_model only documents the shape.
+    """
     
-    # Get file
-    file = db.query(FileModel).filter(FileModel.id == preview_data.file_id).first()
+    # pandas and the engine load on first use, not at API startup
+    from app.engine.engine import engine
+    from app.engine.input_cache import load_input_frame
+    from app.readers.factory import read_dataframe
+    
+    # Get file (input and referenced files must belong to the company)
+    file = db.query(FileModel).filter(
+        FileModel.id == preview_data.file_id,
+        FileModel.company_id == company.id
+    ).first()
     
     if not file:
         raise HTTPException(
@@ -175,21 +489,35 @@ async def preview_workflow(
             detail="File not found"
         )
     
-    # Read Excel
+    sheet = preview_data.sheet or preview_data.rules.get("sheet")
+    
+    # Read input (only the selected sheet is parsed)
     try:
-        df = pd.read_excel(file.storage_path)
+        df = load_input_frame(
+            file.id,
+            file.storage_path,
+            lambda: read_dataframe(file.storage_path, sheet=sheet),
+            variant=(("sheet", sheet),) if sheet is not None else None
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to read Excel file: {str(e)}"
+            detail=f"Failed to read input file: {str(e)}"
         )
     
     # Run preview
     try:
-        result = engine.preview(df, preview_data.rules, max_rows=20)
-        return result
+        result = engine.preview(
+            df,
+            preview_data.rules,
+            max_rows=20,
+            file_resolver=make_file_resolver(db, company.id),
+            shared_input=True
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Preview failed: {str(e)}"
         )
+    
+    return Response(content=preview_to_json(result), media_type="application/json")
@@ -1,41 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List
-import pandas as pd
+import hashlib
 import os
 from datetime import datetime, timedelta
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from app.database import get_db
-from app.models import User, File as FileModel
-from app.auth import get_current_user
+from app.models import User, Company, File as FileModel
+from app.auth import get_current_user, get_current_company, member_company_ids
 from app.schemas import FileUploadResponse
 from app.config import settings
+from app.responses import file_download
+from app.storage import file_content_hash
 from jose import jwt
 
 router = APIRouter(prefix="/files", tags=["Files"])
 
-
-def get_company_id(current_user: User = Depends(get_current_user)) -> str:
-    """Extract company_id from user context"""
-    # In production, get this from JWT or user's active company
-    return "temp-company-id"  # TODO: Implement properly
+# Upload read size; large CSVs are streamed to disk, never held in memory
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 
 @router.post("/upload", response_model=FileUploadResponse)
 async def upload_file(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    company: Company = Depends(get_current_company)
 ):
-    """Upload Excel file and extract column information"""
+    """Upload Excel or CSV/TSV file and extract column information"""
+    
+    # pandas loads on first use, not at API startup
+    from app.readers.factory import read_columns, list_sheets, SUPPORTED_EXTENSIONS, DELIMITED_EXTENSIONS
     
-    if not file.filename.endswith(('.xlsx', '.xls')):
+    if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only Excel files (.xlsx, .xls) are supported"
+            detail=f"Only Excel and CSV files ({', '.join(SUPPORTED_EXTENSIONS)}) are supported"
         )
     
+    max_size = (
+        settings.MAX_CSV_FILE_SIZE
+        if file.filename.lower().endswith(DELIMITED_EXTENSIONS)
+        else settings.MAX_FILE_SIZE
+    )
+    
     # Create uploads directory
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     
@@ -45,29 +54,43 @@ async def upload_file(
     storage_filename = f"{file_id}{file_extension}"
     storage_path = os.path.join(settings.UPLOAD_DIR, storage_filename)
     
-    # Save file
+    # Save file in chunks, hashing as we go (download ETag)
+    size = 0
+    digest = hashlib.sha256()
     with open(storage_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                break
+            digest.update(chunk)
+            buffer.write(chunk)
+    
+    if size > max_size:
+        os.remove(storage_path)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {max_size // (1024 * 1024)}MB limit"
+        )
     
-    # Read Excel to get columns
+    # Read sheet names and the header of the first sheet only
     try:
-        df = pd.read_excel(storage_path)
-        columns = df.columns.tolist()
+        sheets = list_sheets(storage_path)
+        columns = read_columns(storage_path)
     except Exception as e:
         os.remove(storage_path)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Failed to read Excel file: {str(e)}"
+            detail=f"Failed to read file: {str(e)}"
         )
     
-    # Save file record (simplified - TODO: add proper company_id)
+    # Save file record
     file_record = FileModel(
         id=file_id,
-        company_id="temp-company-id",  # TODO: Get from current_user
+        company_id=company.id,
         original_filename=file.filename,
         storage_path=storage_path,
         file_type="input",
+        content_hash=digest.hexdigest(),
         expires_at=datetime.utcnow() + timedelta(hours=settings.FILE_EXPIRATION_HOURS)
     )
     db.add(file_record)
@@ -76,19 +99,29 @@ async def upload_file(
     return {
         "file_id": file_id,
         "filename": file.filename,
-        "columns": columns
+        "columns": columns,
+        "sheets": sheets
     }
 
 
 @router.get("/{file_id}/download")
-async def download_file(
-    file_id: str,
+def download_file(
+    file_id: UUID,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Download a file"""
+    """Download a file (supports If-None-Match, Range and gzip for CSV)"""
     
-    file_record = db.query(FileModel).filter(FileModel.id == file_id).first()
+    # One query: lookup and company authorization
+    file_record = (
+        db.query(FileModel)
+        .filter(
+            FileModel.id == file_id,
+            FileModel.company_id.in_(member_company_ids(current_user))
+        )
+        .first()
+    )
     
     if not file_record:
         raise HTTPException(
@@ -96,17 +129,15 @@ async def download_file(
             detail="File not found"
         )
     
-    # TODO: Check company_id authorization
-    
     if not os.path.exists(file_record.storage_path):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="File not found on disk"
         )
     
-    from fastapi.responses import FileResponse
-    return FileResponse(
-        path=file_record.storage_path,
-        filename=file_record.original_filename,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    return file_download(
+        request,
+        file_record.storage_path,
+        file_record.original_filename,
+        file_record.content_hash or file_content_hash(file_record.storage_path)
     )
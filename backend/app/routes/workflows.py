@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
+from uuid import UUID
 
-from app.database import get_db
-from app.models import User, Workflow, WorkflowVersion
-from app.auth import get_current_user
+from app.database import get_db, get_async_db
+from app.models import User, Company, Workflow, WorkflowVersion
+from app.auth import get_current_user, get_current_user_async, get_current_company, current_company_id
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate_async, set_next_cursor
+from app.responses import json_response
+from app.serialization import models_to_json
 from app.schemas import (
     WorkflowCreate,
     WorkflowResponse,
     WorkflowVersionCreate,
-    WorkflowVersionResponse
+    WorkflowVersionResponse,
+    WorkflowVersionSummary
 )
 
 router = APIRouter(prefix="/workflows", tags=["Workflows"])
@@ -19,12 +26,13 @@ router = APIRouter(prefix="/workflows", tags=["Workflows"])
 def create_workflow(
     workflow_data: WorkflowCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    company: Company = Depends(get_current_company)
 ):
     """Create a new workflow"""
     
     workflow = Workflow(
-        company_id="temp-company-id",  # TODO: Get from user context
+        company_id=company.id,
         name=workflow_data.name,
         description=workflow_data.description
     )
@@ -37,16 +45,30 @@ def create_workflow(
 
 
 @router.get("", response_model=List[WorkflowResponse])
-def list_workflows(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def list_workflows(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    """List all workflows for current company"""
+    """List active workflows for current company, newest first (one page)"""
     
-    # TODO: Filter by company_id
-    workflows = db.query(Workflow).filter(Workflow.is_active == True).all()
+    statement = select(Workflow).where(
+        Workflow.company_id == current_company_id(current_user),
+        Workflow.is_active == True
+    )
     
-    return workflows
+    workflows, next_cursor = await paginate_async(
+        db,
+        statement,
+        [Workflow.created_at, Workflow.id],
+        cursor,
+        limit
+    )
+    set_next_cursor(response, next_cursor)
+    
+    return json_response(models_to_json(WorkflowResponse, workflows), response)
 
 
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
@@ -113,19 +135,57 @@ def create_workflow_version(
     return version
 
 
-@router.get("/{workflow_id}/versions", response_model=List[WorkflowVersionResponse])
-def list_workflow_versions(
-    workflow_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+@router.get(
+    "/{workflow_id}/versions",
+    response_model=List[Union[WorkflowVersionResponse, WorkflowVersionSummary]]
+)
+async def list_workflow_versions(
+    workflow_id: UUID,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_rules: bool = True,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
-    """List all versions of a workflow"""
+    """List versions of a workflow, newest first (one page)"""
     
-    versions = (
-        db.query(WorkflowVersion)
-        .filter(WorkflowVersion.workflow_id == workflow_id)
-        .order_by(WorkflowVersion.version_number.desc())
-        .all()
+    workflow = await db.scalar(
+        select(Workflow.id).where(
+            Workflow.id == workflow_id,
+            Workflow.company_id == current_company_id(current_user)
+        )
+    )
+    
+    if not workflow:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Workflow not found"
+        )
+    
+    # Without rules, rules_json is never loaded from the database
+    if include_rules:
+        statement = select(WorkflowVersion)
+    else:
+        statement = select(
+            WorkflowVersion.id,
+            WorkflowVersion.workflow_id,
+            WorkflowVersion.version_number,
+            WorkflowVersion.created_at
+        )
+    
+    statement = statement.where(WorkflowVersion.workflow_id == workflow_id)
+    
+    versions, next_cursor = await paginate_async(
+        db,
+        statement,
+        [WorkflowVersion.version_number, WorkflowVersion.id],
+        cursor,
+        limit,
+        scalars=include_rules
     )
+    set_next_cursor(response, next_cursor)
     
-    return versions
+    # Projected rows carry no rules_json, so they serialise as WorkflowVersionSummary
+    schema = WorkflowVersionResponse if include_rules else WorkflowVersionSummary
+    return json_response(models_to_json(schema, versions), response)
@@ -53,28 +53,33 @@ class WorkflowVersionCreate(BaseModel):
     rules: Dict[str, Any]
 
 
-class WorkflowVersionResponse(BaseModel):
+class WorkflowVersionSummary(BaseModel):
     id: UUID
     workflow_id: UUID
     version_number: int
-    rules_json: Dict[str, Any]
     created_at: datetime
     
     class Config:
         from_attributes = True
 
 
+class WorkflowVersionResponse(WorkflowVersionSummary):
+    rules_json: Dict[str, Any]
+
+
 # File schemas
 class FileUploadResponse(BaseModel):
     file_id: UUID
     filename: str
     columns: List[str]
+    sheets: List[str] = []  # workbook sheet names; empty for CSV/TSV
 
 
 # Execution schemas
 class ExecutionCreate(BaseModel):
     workflow_version_id: UUID
     file_id: UUID
+    sheet: Optional[str] = None  # overrides the workflow's "sheet"
 
 
 class ExecutionResponse(BaseModel):
@@ -84,11 +89,31 @@ class ExecutionResponse(BaseModel):
     started_at: Optional[datetime]
     finished_at: Optional[datetime]
     error_message: Optional[str]
+    created_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
 
+class ExecutionStatsResponse(BaseModel):
+    workflow_id: UUID
+    workflow_name: str
+    executions: int
+    succeeded: int
+    failed: int
+    failure_rate: Optional[float]  # failed / finished
+    p50_duration_seconds: Optional[float]
+    p95_duration_seconds: Optional[float]
+    
+    class Config:
+        from_attributes = True
+
+
+class ExecutionOutputResponse(BaseModel):
+    file_id: UUID
+    filename: str  # one workbook per output sheet: "<sheet>.xlsx"
+
+
 class ExecutionLogResponse(BaseModel):
     step_index: int
     step_type: str
@@ -104,6 +129,7 @@ class ExecutionLogResponse(BaseModel):
 class PreviewRequest(BaseModel):
     file_id: UUID
     rules: Dict[str, Any]
+    sheet: Optional[str] = None  # overrides rules["sheet"]
 
 
 class PreviewResponse(BaseModel):
@@ -0,0 +1,89 @@
+import datetime
+import math
+from functools import lru_cache
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    """Types orjson does not know natively: pandas scalars, numpy scalars, decimals"""
+    # pandas NaT / NA (neither compares or serialises normally)
+    if type(value).__name__ in ("NaTType", "NAType"):
+        return None
+
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+
+    if hasattr(value, "item"):
+        # numpy scalar -> Python scalar
+        item = value.item()
+        if isinstance(item, float) and not math.isfinite(item):
+            return None
+        return item
+
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+
+    return str(value)
+
+
+def dumps(obj) -> bytes:
+    """Serialise plain Python/numpy data to JSON bytes; NaN becomes null"""
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+def frame_to_json(df) -> bytes:
+    """
+    Serialise a DataFrame as a JSON array of records, without building dicts
+
+    Uses pandas' C encoder: NaN/NaT become null, datetimes ISO 8601, numpy
+    and Arrow-backed columns are written directly.
+    """
+    return df.to_json(
+        orient="records",
+        date_format="iso",
+        date_unit="ms",
+        force_ascii=False,
+        default_handler=str
+    ).encode()
+
+
+def preview_to_json(preview: dict) -> bytes:
+    """
+    JSON body for engine.preview() output, frames embedded as-is
+
+    The response is assembled from pre-serialised fragments, so the rows
+    are never turned into Python dicts or validated by Pydantic.
+    """
+    after = preview["after"]
+    after_rows = frame_to_json(after["rows"]) if after.get("rows") is not None else b"[]"
+    after_sheet = b'"sheet":' + dumps(after["sheet"]) + b"," if "sheet" in after else b""
+
+    return b"".join([
+        b'{"before":', frame_to_json(preview["before"]),
+        b',"after":{', after_sheet, b'"rows":', after_rows, b"}",
+        b',"logs":', dumps(preview["logs"]),
+        b"}",
+    ])
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def models_to_json(schema, rows) -> bytes:
+    """
+    JSON array of rows (ORM objects or result rows) shaped by a Pydantic schema
+
+    Each row is read by attribute once and written by pydantic-core's JSON
+    serialiser, so the route skips FastAPI's response_model validation and
+    jsonable_encoder pass.
+    """
+    adapter = _list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
@@ -0,0 +1,46 @@
+import hashlib
+import os
+from functools import lru_cache
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.models import File as FileModel
+
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+@lru_cache(maxsize=1024)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    """Hash file content; cached per (path, mtime, size) so unchanged files are read once"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_content_hash(path: str) -> str:
+    """Return the SHA-256 hex digest of a stored file"""
+    stat = os.stat(path)
+    return _hash_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+def make_file_resolver(db: Session, company_id) -> Callable[[str], str]:
+    """Build a callable that maps a file id of the company to its storage path"""
+
+    def resolve(file_id: str) -> str:
+        file = db.query(FileModel).filter(
+            FileModel.id == file_id,
+            FileModel.company_id == company_id
+        ).first()
+        if not file:
+            raise ValueError(f"File {file_id} not found")
+
+        if not os.path.exists(file.storage_path):
+            raise ValueError(f"File {file_id} not found on disk")
+
+        return file.storage_path
+
+    return resolve
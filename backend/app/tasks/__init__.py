@@ -1,10 +1,17 @@
 from celery import Celery
+from kombu import Queue
 from app.config import settings
 
 celery_app = Celery(
     "macrobuilder",
     broker=settings.CELERY_BROKER_URL,
-    backend=settings.CELERY_RESULT_BACKEND
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=[
+        "app.tasks.worker",
+        "app.tasks.workflow_execution",
+        "app.tasks.scheduler",
+        "app.tasks.maintenance",
+    ]
 )
 
 celery_app.conf.update(
@@ -13,4 +20,43 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Interactive (small) and batch (large) executions never share a queue
+    task_queues=(Queue("small"), Queue("large")),
+    task_default_queue="small",
+    task_queue_max_priority=10,
+    task_default_priority=5,
+    # Ack after the task finishes so a prefetched job is not lost on restart.
+    # Killed workers (e.g. OOM) do not requeue, to avoid crash loops.
+    task_acks_late=True,
+    task_reject_on_worker_lost=False,
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "queue_order_strategy": "priority",
+        "visibility_timeout": 2 * 60 * 60,
+    },
+    beat_schedule={
+        "pump-scheduler": {
+            "task": "pump_scheduler",
+            "schedule": 30.0,
+        },
+        "purge-expired-files": {
+            "task": "purge_expired_files",
+            "schedule": float(settings.FILE_PURGE_INTERVAL_SECONDS),
+        },
+    },
 )
+
+# Per-queue worker tuning, selected by CELERY_WORKER_PROFILE
+WORKER_PROFILES = {
+    # Many short jobs: keep a few prefetched to hide broker latency
+    "small": {
+        "worker_prefetch_multiplier": 4,
+    },
+    # Few heavy jobs: never hoard work, recycle children that grew too large
+    "large": {
+        "worker_prefetch_multiplier": 1,
+        "worker_max_memory_per_child": settings.CELERY_LARGE_MAX_MEMORY_PER_CHILD_KB,
+    },
+}
+
+celery_app.conf.update(**WORKER_PROFILES[settings.CELERY_WORKER_PROFILE])
@@ -0,0 +1,109 @@
+import glob
+import logging
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import exists
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Execution, ExecutionFile, File as FileModel
+from app.tasks import celery_app
+
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT_STATUSES = ("pending", "running")
+
+
+def blob_paths(storage_path: str) -> List[str]:
+    """A stored file plus the columnar sidecars written next to it"""
+    # <file>.parquet for the default sheet, <file>.<digest>.parquet per named sheet
+    sidecars = glob.glob(glob.escape(storage_path) + ".*parquet")
+    return [storage_path] + sidecars
+
+
+def _remove(path: str) -> int:
+    """Delete one blob, returning the bytes reclaimed"""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+    except FileNotFoundError:
+        return 0
+
+
+def purge_expired_files(
+    db,
+    now: Optional[datetime] = None,
+    batch_size: int = None,
+    max_batches: int = None
+) -> Dict[str, int]:
+    """
+    Delete expired files, their sidecars and their rows, in bounded batches
+
+    Files linked to a pending or running execution are kept until a later
+    run. Each batch is one range scan on the expires_at index and one bulk
+    DELETE, committed on its own so locks stay short.
+
+    Returns:
+        Dict with files and bytes reclaimed
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or settings.FILE_PURGE_BATCH_SIZE
+    max_batches = max_batches or settings.FILE_PURGE_MAX_BATCHES
+
+    in_flight = exists().where(
+        ExecutionFile.file_id == FileModel.id,
+        ExecutionFile.execution_id == Execution.id,
+        Execution.status.in_(IN_FLIGHT_STATUSES)
+    )
+
+    files = 0
+    reclaimed = 0
+
+    for _ in range(max_batches):
+        batch = (
+            db.query(FileModel.id, FileModel.storage_path)
+            .filter(FileModel.expires_at < now, ~in_flight)
+            .order_by(FileModel.expires_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not batch:
+            break
+
+        for row in batch:
+            for path in blob_paths(row.storage_path):
+                reclaimed += _remove(path)
+
+        # execution_files links go with the rows (ON DELETE CASCADE)
+        db.query(FileModel).filter(
+            FileModel.id.in_([row.id for row in batch])
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        files += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    return {"files": files, "bytes": reclaimed}
+
+
+@celery_app.task(name="purge_expired_files")
+def purge_expired_files_task():
+    """Celery beat entry point for purge_expired_files"""
+    db = SessionLocal()
+    try:
+        result = purge_expired_files(db)
+    finally:
+        db.close()
+
+    logger.info(
+        "Purged %d expired files, reclaimed %d bytes",
+        result["files"],
+        result["bytes"]
+    )
+    return result
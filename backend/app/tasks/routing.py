@@ -0,0 +1,119 @@
+from collections import defaultdict
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Execution, ExecutionLog, WorkflowVersion
+
+
+# Redis delivers lower numbers first
+HIGHEST_PRIORITY = 0
+LOWEST_PRIORITY = 9
+
+# Recent successful runs used to learn filter selectivity
+SELECTIVITY_HISTORY_RUNS = 20
+
+
+def _successful_runs(db: Session, criterion) -> list:
+    """(id, input_rows) of the latest successful executions matching criterion"""
+    return (
+        db.query(Execution.id, Execution.input_rows)
+        .join(WorkflowVersion, Execution.workflow_version_id == WorkflowVersion.id)
+        .filter(
+            criterion,
+            Execution.status == "success",
+            Execution.input_rows > 0
+        )
+        .order_by(Execution.finished_at.desc())
+        .limit(SELECTIVITY_HISTORY_RUNS)
+        .all()
+    )
+
+
+def filter_selectivity_history(db: Session, version: WorkflowVersion) -> List[float]:
+    """
+    Average kept/input row ratio of each filter step, in step order
+
+    Learned from recent successful executions of this version, using their
+    input row count and the affected_rows of each filter log entry. Other
+    versions of the workflow (whose filters may differ) are only used when
+    this version has no history yet.
+    """
+    executions = _successful_runs(db, Execution.workflow_version_id == version.id)
+    if not executions:
+        executions = _successful_runs(db, WorkflowVersion.workflow_id == version.workflow_id)
+
+    if not executions:
+        return []
+
+    input_rows = {execution_id: rows for execution_id, rows in executions}
+
+    logs = (
+        db.query(ExecutionLog.execution_id, ExecutionLog.affected_rows)
+        .filter(
+            ExecutionLog.execution_id.in_(input_rows.keys()),
+            ExecutionLog.step_type == "filter"
+        )
+        .order_by(ExecutionLog.execution_id, ExecutionLog.step_index)
+        .all()
+    )
+
+    # Per filter ordinal: ratios observed across executions
+    observed = defaultdict(list)
+    rows_before = dict(input_rows)
+    ordinal = defaultdict(int)
+
+    for execution_id, affected_rows in logs:
+        before = rows_before[execution_id]
+        if before:
+            observed[ordinal[execution_id]].append(affected_rows / before)
+        rows_before[execution_id] = affected_rows
+        ordinal[execution_id] += 1
+
+    return [
+        sum(observed[i]) / len(observed[i])
+        for i in range(len(observed))
+        if observed[i]
+    ]
+
+
+def time_limits(plan: Optional[str]) -> Tuple[int, int]:
+    """Soft and hard time limits, in seconds, of an execution on a plan"""
+    soft = settings.EXECUTION_SOFT_TIME_LIMIT_SECONDS.get(
+        plan or "free", settings.EXECUTION_SOFT_TIME_LIMIT_SECONDS["free"]
+    )
+    return soft, soft + settings.EXECUTION_HARD_TIME_LIMIT_GRACE_SECONDS
+
+
+def route_execution(estimate: dict, plan: Optional[str] = None) -> dict:
+    """
+    Choose queue, priority and time limits for an execution
+
+    Args:
+        estimate: Result of estimate_execution()
+        plan: Company plan, selects the time limits
+
+    Returns:
+        Options for Task.apply_async (queue, priority, soft_time_limit,
+        time_limit)
+    """
+    large = estimate["peak_memory_bytes"] >= settings.LARGE_EXECUTION_MEMORY_BYTES
+    queue = "large" if large else "small"
+
+    # Shorter jobs jump ahead within their queue
+    priority = min(
+        LOWEST_PRIORITY,
+        HIGHEST_PRIORITY + int(estimate["runtime_seconds"] // settings.PRIORITY_STEP_SECONDS)
+    )
+
+    soft_limit, hard_limit = time_limits(plan)
+
+    return {
+        "queue": queue,
+        "priority": priority,
+        # Soft limit raises inside the task, which records the timeout and
+        # cleans up; the hard limit kills the child if that does not happen
+        "soft_time_limit": soft_limit,
+        "time_limit": hard_limit
+    }
@@ -0,0 +1,239 @@
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import redis
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Company, Execution
+from app.tasks import celery_app
+from app.tasks.routing import time_limits
+
+
+# Redis keys
+LOCK_KEY = "sched:lock"
+ROTATION_KEY = "sched:tenants"          # list: round-robin order of tenants with pending work
+TENANT_SET_KEY = "sched:tenant_set"     # set: membership check for ROTATION_KEY
+PENDING_KEY = "sched:pending:{}"        # list: queued jobs of one tenant
+INFLIGHT_KEY = "sched:inflight:{}"      # zset: execution_id -> dispatch time
+PLAN_KEY = "sched:plan:{}"              # string: plan of one tenant
+CANCEL_KEY = "sched:cancel:{}"          # string: set when an execution must stop
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Shared Redis client for scheduler state"""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+
+def _quota(plan: Optional[str]) -> int:
+    return settings.TENANT_CONCURRENCY.get(plan or "free", settings.TENANT_CONCURRENCY["free"])
+
+
+def _weight(plan: Optional[str]) -> int:
+    return settings.TENANT_WEIGHTS.get(plan or "free", settings.TENANT_WEIGHTS["free"])
+
+
+def submit(company_id: str, plan: str, execution_id: str, args: List, options: dict):
+    """
+    Queue an execution for its tenant and dispatch whatever quotas allow
+
+    Args:
+        company_id: Tenant owning the execution
+        plan: Tenant plan (free, pro, enterprise)
+        execution_id: UUID of the execution record
+        args: Positional arguments for the execute_workflow task
+        options: Task.apply_async options (queue, priority, ...)
+    """
+    r = get_redis()
+    payload = json.dumps({
+        "execution_id": execution_id,
+        "args": args,
+        "options": options
+    })
+
+    with r.lock(LOCK_KEY, timeout=30, blocking_timeout=10):
+        r.set(PLAN_KEY.format(company_id), plan)
+        r.rpush(PENDING_KEY.format(company_id), payload)
+        if r.sadd(TENANT_SET_KEY, company_id):
+            r.rpush(ROTATION_KEY, company_id)
+
+        _pump(r)
+
+
+def release(company_id: str, execution_id: str):
+    """Mark an execution as finished and dispatch the next queued jobs"""
+    r = get_redis()
+
+    with r.lock(LOCK_KEY, timeout=30, blocking_timeout=10):
+        r.zrem(INFLIGHT_KEY.format(company_id), execution_id)
+        r.delete(CANCEL_KEY.format(execution_id))
+        _pump(r)
+
+
+def cancel(company_id: str, execution_id: str) -> bool:
+    """
+    Cancel an execution
+
+    Returns:
+        True if it was still queued and has been removed (never dispatched);
+        False if it was dispatched, in which case it is flagged and the
+        worker stops at its next cancellation check
+    """
+    r = get_redis()
+    pending_key = PENDING_KEY.format(company_id)
+
+    with r.lock(LOCK_KEY, timeout=30, blocking_timeout=10):
+        for payload in r.lrange(pending_key, 0, -1):
+            if json.loads(payload)["execution_id"] == execution_id:
+                r.lrem(pending_key, 1, payload)
+                return True
+
+        r.set(CANCEL_KEY.format(execution_id), 1, ex=settings.SCHEDULER_INFLIGHT_TTL_SECONDS)
+        return False
+
+
+def is_cancelled(execution_id: str) -> bool:
+    """Whether cancellation was requested for a dispatched execution"""
+    return bool(get_redis().exists(CANCEL_KEY.format(execution_id)))
+
+
+def pump():
+    """Dispatch queued jobs; also reclaims slots of workers that died"""
+    r = get_redis()
+
+    with r.lock(LOCK_KEY, timeout=30, blocking_timeout=10):
+        _pump(r)
+
+
+def _pump(r: redis.Redis):
+    """
+    Weighted round-robin over tenants with pending work
+
+    Each pass gives every tenant up to its plan weight in dispatches, bounded
+    by its plan concurrency quota. Passes repeat until nothing can move, so
+    one tenant's backlog never delays another tenant's first job by more than
+    a single round. Must be called with the scheduler lock held.
+
+    A broker failure stops the pump without raising: the job is back in its
+    queue and the next release or beat pump dispatches it.
+    """
+    stale_before = time.time() - settings.SCHEDULER_INFLIGHT_TTL_SECONDS
+    tenants = r.lrange(ROTATION_KEY, 0, -1)
+
+    progress = True
+    while progress and tenants:
+        progress = False
+
+        for company_id in list(tenants):
+            inflight_key = INFLIGHT_KEY.format(company_id)
+            pending_key = PENDING_KEY.format(company_id)
+            plan = r.get(PLAN_KEY.format(company_id))
+
+            # Slots held longer than any task may run belong to dead workers
+            r.zremrangebyscore(inflight_key, "-inf", stale_before)
+
+            for _ in range(_weight(plan)):
+                if r.zcard(inflight_key) >= _quota(plan):
+                    break
+
+                payload = r.lpop(pending_key)
+                if payload is None:
+                    r.srem(TENANT_SET_KEY, company_id)
+                    r.lrem(ROTATION_KEY, 0, company_id)
+                    tenants.remove(company_id)
+                    break
+
+                try:
+                    _dispatch(r, company_id, payload)
+                except Exception:
+                    logger.exception("Dispatch to the broker failed; job left queued")
+                    return
+                progress = True
+
+    # Start the next pump with a different tenant
+    r.lmove(ROTATION_KEY, ROTATION_KEY, "LEFT", "RIGHT")
+
+
+def _dispatch(r: redis.Redis, company_id: str, payload: str):
+    job = json.loads(payload)
+    inflight_key = INFLIGHT_KEY.format(company_id)
+
+    r.zadd(inflight_key, {job["execution_id"]: time.time()})
+    try:
+        celery_app.send_task("execute_workflow", args=job["args"], **job["options"])
+    except Exception:
+        # Broker unavailable: give the slot and the job back
+        r.zrem(inflight_key, job["execution_id"])
+        r.lpush(PENDING_KEY.format(company_id), payload)
+        raise
+
+
+# Time the task itself gets, after its hard limit, to record the outcome
+KILLED_EXECUTION_MARGIN_SECONDS = 60
+
+
+def expire_killed_executions(db, now: Optional[datetime] = None) -> int:
+    """
+    Fail running executions that outlived their plan's hard time limit
+
+    The hard limit (or the OOM killer) kills the worker child before the
+    task can record anything, so the row would stay running and hold its
+    tenant slot until SCHEDULER_INFLIGHT_TTL_SECONDS. Returns the number of
+    executions expired.
+    """
+    now = now or datetime.utcnow()
+    shortest = min(time_limits(plan)[1] for plan in settings.EXECUTION_SOFT_TIME_LIMIT_SECONDS)
+
+    candidates = (
+        db.query(Execution, Company.plan)
+        .join(Company, Company.id == Execution.company_id)
+        .filter(
+            Execution.status == "running",
+            Execution.started_at < now - timedelta(seconds=shortest + KILLED_EXECUTION_MARGIN_SECONDS)
+        )
+        .with_for_update(of=Execution, skip_locked=True)
+        .all()
+    )
+
+    expired = []
+    for execution, plan in candidates:
+        deadline = execution.started_at + timedelta(
+            seconds=time_limits(plan)[1] + KILLED_EXECUTION_MARGIN_SECONDS
+        )
+        if deadline > now:
+            continue
+
+        execution.status = "failed"
+        execution.finished_at = now
+        execution.error_message = "Time limit exceeded"
+        expired.append((str(execution.company_id), str(execution.id)))
+
+    db.commit()
+
+    for company_id, execution_id in expired:
+        logger.warning("Execution %s exceeded its hard time limit; marked failed", execution_id)
+        release(company_id, execution_id)
+
+    return len(expired)
+
+
+@celery_app.task(name="pump_scheduler")
+def pump_scheduler_task():
+    """Periodic safety net for slots leaked by killed workers"""
+    db = SessionLocal()
+    try:
+        expire_killed_executions(db)
+    finally:
+        db.close()
+
+    pump()
@@ -0,0 +1,65 @@
+import importlib
+import logging
+
+from celery.signals import worker_process_init
+
+from app.config import settings
+from app.database import configure_engine
+
+
+logger = logging.getLogger(__name__)
+
+# Imported by the first task otherwise: engine, rules and reader dispatch
+PRELOAD_MODULES = (
+    "pandas",
+    "app.engine.engine",
+    "app.engine.rules.factory",
+    "app.engine.reference",
+    "app.engine.input_cache",
+    "app.engine.checkpoint",
+    "app.readers.factory",
+)
+
+# Loaded lazily by pandas the first time each format is read or written
+READER_EXTRA_MODULES = {
+    "columnar": ("pyarrow.parquet",),
+    "csv_arrow": ("pyarrow.csv",),
+}
+WRITER_MODULES = ("xlsxwriter", "openpyxl")
+
+
+def warm_readers():
+    """Import the backend of every available reader, so no task pays for it"""
+    from app.readers.factory import READER_REGISTRY, available_readers
+
+    for name, available in available_readers().items():
+        if not available or name not in settings.READER_BACKENDS:
+            continue
+        for module in READER_REGISTRY[name].requires + READER_EXTRA_MODULES.get(name, ()):
+            importlib.import_module(module)
+
+    for module in WRITER_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """
+    Prepare a freshly forked worker child before it takes its first task
+
+    The database pool inherited from the parent is replaced by one sized
+    for a single-task child; connections are checked with pre-ping and
+    recycled (DB_POOL_RECYCLE_SECONDS) so idle children survive restarts of
+    the database or a proxy. Engine modules and reader backends are imported
+    here rather than inside the first task.
+    """
+    configure_engine(settings.CELERY_DB_POOL_SIZE, settings.CELERY_DB_MAX_OVERFLOW)
+
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    warm_readers()
+
+    logger.info("Worker process ready: engine preloaded, readers warmed")
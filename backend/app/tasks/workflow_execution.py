@@ -1,16 +1,40 @@
-import pandas as pd
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
+import gc
 import os
 
+from celery.exceptions import SoftTimeLimitExceeded
+
+from app.cancellation import ExecutionCancelled, raise_if_cancelled
 from app.tasks import celery_app
+from app.tasks import scheduler
+from app.engine.checkpoint import CheckpointStore
 from app.engine.engine import engine
+from app.engine.input_cache import load_input_frame
+from app.readers.factory import read_dataframe
 from app.database import SessionLocal
+from app.storage import file_content_hash, make_file_resolver
 from app.models import Execution, ExecutionLog, WorkflowVersion, File as FileModel
 
 
+def _interruption(error: BaseException):
+    """Cancellation or soft time limit behind an error (rules wrap their errors)"""
+    while error is not None:
+        if isinstance(error, (ExecutionCancelled, SoftTimeLimitExceeded)):
+            return error
+        error = error.__cause__
+    return None
+
+
 @celery_app.task(name="execute_workflow")
-def execute_workflow_task(execution_id: str, workflow_version_id: str, input_file_id: str):
+def execute_workflow_task(
+    execution_id: str,
+    workflow_version_id: str,
+    input_file_id: str,
+    engine_mode: Optional[str] = None,
+    sheet: Optional[str] = None
+):
     """
     Celery task to execute a workflow asynchronously
     
@@ -18,8 +42,23 @@ def execute_workflow_task(execution_id: str, workflow_version_id: str, input_fil
         execution_id: UUID of the execution record
         workflow_version_id: UUID of the workflow version
         input_file_id: UUID of the input file
+        engine_mode: Engine mode override (see ENGINE_MODES)
+        sheet: Workbook sheet to read (first sheet when None)
+    
+    Cancellation (POST /executions/{id}/cancel) is checked before the run,
+    every CANCEL_CHECK_BYTES of CSV/TSV input parsed (workbooks are parsed
+    in one call), between steps and between output sheets. The soft time
+    limit of the company plan interrupts the task the same way.
     """
     db = SessionLocal()
+    execution = None
+    result = None
+    df = None
+    output_paths = []
+    interrupted = False
+    
+    def should_cancel() -> bool:
+        return scheduler.is_cancelled(execution_id)
     
     try:
         # Get execution record
@@ -27,6 +66,13 @@ def execute_workflow_task(execution_id: str, workflow_version_id: str, input_fil
         if not execution:
             raise Exception(f"Execution {execution_id} not found")
         
+        # Already settled, e.g. marked failed when the API could not queue it
+        if execution.status != "pending":
+            return {"status": execution.status}
+        
+        # Cancelled while waiting in the broker queue
+        raise_if_cancelled(should_cancel)
+        
         # Update status to running
         execution.status = "running"
         execution.started_at = datetime.utcnow()
@@ -42,11 +88,30 @@ def execute_workflow_task(execution_id: str, workflow_version_id: str, input_fil
         if not input_file:
             raise Exception(f"Input file {input_file_id} not found")
         
-        # Read Excel file
-        df = pd.read_excel(input_file.storage_path)
+        # Read input sheet (reused across executions of the same file on this worker)
+        read_options = engine.read_options(engine_mode)
+        df = load_input_frame(
+            input_file.id,
+            input_file.storage_path,
+            lambda: read_dataframe(
+                input_file.storage_path, sheet=sheet, should_cancel=should_cancel, **read_options
+            ),
+            variant=tuple(sorted(read_options.items())) + (("sheet", sheet),)
+        )
+        execution.input_rows = len(df)
         
         # Execute workflow
-        result = engine.run(df, version.rules_json)
+        result = engine.run(
+            df,
+            version.rules_json,
+            file_resolver=make_file_resolver(db, execution.company_id),
+            input_hash=CheckpointStore.input_key(
+                str(execution.company_id), file_content_hash(input_file.storage_path), sheet, read_options
+            ),
+            mode=engine_mode,
+            shared_input=True,
+            should_cancel=should_cancel
+        )
         
         # Save logs
         for idx, log in enumerate(result["logs"]):
@@ -63,11 +128,15 @@ def execute_workflow_task(execution_id: str, workflow_version_id: str, input_fil
         from app.config import settings
         output_file_ids = []
         
+        # Spilled sheets are read back one at a time
         for sheet_name, output_df in result["outputs"].items():
+            raise_if_cancelled(should_cancel)
+            
             # Generate output file
             output_filename = f"output_{execution_id}_{sheet_name}.xlsx"
             output_path = os.path.join(settings.UPLOAD_DIR, output_filename)
             
+            output_paths.append(output_path)
             output_df.to_excel(output_path, index=False, sheet_name=sheet_name)
             
             # Create file record
@@ -77,6 +146,7 @@ def execute_workflow_task(execution_id: str, workflow_version_id: str, input_fil
                 original_filename=f"{sheet_name}.xlsx",
                 storage_path=output_path,
                 file_type="output",
+                content_hash=file_content_hash(output_path),
                 expires_at=datetime.utcnow() + timedelta(hours=settings.FILE_EXPIRATION_HOURS)
             )
             db.add(output_file)
@@ -105,16 +175,47 @@ def execute_workflow_task(execution_id: str, workflow_version_id: str, input_fil
         }
         
     except Exception as e:
-        # Mark as failed
-        execution.status = "failed"
+        interruption = _interruption(e)
+        
+        if interruption is not None:
+            # Nothing of an interrupted run is kept: no logs, no partial outputs
+            interrupted = True
+            db.rollback()
+            for path in output_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        if execution is None:
+            return {"status": "failed", "error": str(e)}
+        
+        if isinstance(interruption, ExecutionCancelled):
+            execution.status = "cancelled"
+            error = "Cancelled by user"
+        elif isinstance(interruption, SoftTimeLimitExceeded):
+            execution.status = "failed"
+            error = "Time limit exceeded"
+        else:
+            # Mark as failed
+            execution.status = "failed"
+            error = str(e)
+        
         execution.finished_at = datetime.utcnow()
-        execution.error_message = str(e)
+        execution.error_message = error
         db.commit()
         
         return {
-            "status": "failed",
-            "error": str(e)
+            "status": execution.status,
+            "error": error
         }
     
     finally:
+        # Release spill files and frames now, not when the child is recycled
+        if result is not None:
+            result["outputs"].close()
+        result = None
+        df = None
+        if interrupted:
+            gc.collect()
+        if execution is not None:
+            scheduler.release(str(execution.company_id), execution_id)
         db.close()
@@ -0,0 +1,129 @@
+"""Initial schema (as previously created by Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-01-01 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "companies",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("plan", sa.String(50)),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("password_hash", sa.Text(), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "roles",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(50), nullable=False, unique=True),
+    )
+
+    op.create_table(
+        "memberships",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("company_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("role_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("roles.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "workflows",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("company_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    op.create_index("ix_workflows_company_id", "workflows", ["company_id"])
+
+    op.create_table(
+        "workflow_versions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("workflow_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("workflows.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("version_number", sa.Integer(), nullable=False),
+        sa.Column("rules_json", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("created_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_workflow_versions_workflow_id", "workflow_versions", ["workflow_id"])
+
+    op.create_table(
+        "executions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("company_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("workflow_version_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("workflow_versions.id"), nullable=False),
+        sa.Column("status", sa.String(50)),
+        sa.Column("started_at", sa.DateTime()),
+        sa.Column("finished_at", sa.DateTime()),
+        sa.Column("error_message", sa.Text()),
+    )
+    op.create_index("ix_executions_company_id", "executions", ["company_id"])
+
+    op.create_table(
+        "execution_logs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("execution_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("executions.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("step_index", sa.Integer(), nullable=False),
+        sa.Column("step_type", sa.String(50), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("affected_rows", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_execution_logs_execution_id", "execution_logs", ["execution_id"])
+
+    op.create_table(
+        "files",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("company_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("original_filename", sa.String(255), nullable=False),
+        sa.Column("storage_path", sa.Text(), nullable=False),
+        sa.Column("file_type", sa.String(50), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_files_company_id", "files", ["company_id"])
+
+    op.create_table(
+        "execution_files",
+        sa.Column("execution_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("executions.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("file_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("files.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("role", sa.String(50), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("execution_files")
+    op.drop_table("files")
+    op.drop_table("execution_logs")
+    op.drop_table("executions")
+    op.drop_table("workflow_versions")
+    op.drop_table("workflows")
+    op.drop_table("memberships")
+    op.drop_table("roles")
+    op.drop_table("users")
+    op.drop_table("companies")
@@ -0,0 +1,79 @@
+"""Execution stats columns, file content hash and listing/search indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-01-01 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("executions", sa.Column("input_rows", sa.Integer()))
+    op.add_column("executions", sa.Column("created_at", sa.DateTime()))
+    # Keyset pagination sorts on (created_at, id): no row may be NULL
+    op.execute("UPDATE executions SET created_at = COALESCE(started_at, timezone('utc', now()))")
+    op.alter_column(
+        "executions",
+        "created_at",
+        nullable=False,
+        server_default=sa.text("timezone('utc', now())")
+    )
+    op.add_column("files", sa.Column("content_hash", sa.String(64)))
+
+    # Keyset pagination
+    op.create_index(
+        "ix_workflows_company_active_created",
+        "workflows",
+        ["company_id", "is_active", "created_at", "id"]
+    )
+    op.create_index(
+        "ix_workflow_versions_workflow_number",
+        "workflow_versions",
+        ["workflow_id", "version_number"]
+    )
+    op.create_index(
+        "ix_executions_company_created",
+        "executions",
+        ["company_id", "created_at", "id"]
+    )
+    op.create_index(
+        "ix_execution_logs_execution_step",
+        "execution_logs",
+        ["execution_id", "step_index", "id"]
+    )
+
+    # Execution search and stats
+    op.create_index(
+        "ix_executions_company_status_started",
+        "executions",
+        ["company_id", "status", "started_at"]
+    )
+    op.create_index(
+        "ix_executions_version_started",
+        "executions",
+        ["workflow_version_id", "started_at"]
+    )
+
+    # Expired file purge
+    op.create_index("ix_files_expires_at", "files", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_files_expires_at", table_name="files")
+    op.drop_index("ix_executions_version_started", table_name="executions")
+    op.drop_index("ix_executions_company_status_started", table_name="executions")
+    op.drop_index("ix_execution_logs_execution_step", table_name="execution_logs")
+    op.drop_index("ix_executions_company_created", table_name="executions")
+    op.drop_index("ix_workflow_versions_workflow_number", table_name="workflow_versions")
+    op.drop_index("ix_workflows_company_active_created", table_name="workflows")
+
+    op.drop_column("files", "content_hash")
+    op.drop_column("executions", "created_at")
+    op.drop_column("executions", "input_rows")
@@ -0,0 +1,96 @@
+import logging
+
+import pandas as pd
+import pytest
+
+from app.engine import engine as engine_module
+from app.engine.checkpoint import CheckpointStore
+from app.engine.engine import RuleEngine
+from app.readers.factory import read_dataframe
+
+
+WORKFLOW = {"steps": [
+    {"type": "filter", "column": "Amount", "operator": ">", "value": 0},
+    {"type": "move", "target_sheet": "Out"},
+]}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = CheckpointStore(str(tmp_path / "checkpoints"), 64 * 1024 * 1024)
+    monkeypatch.setattr(engine_module, "checkpoint_store", store)
+    return store
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = str(tmp_path / "input.xlsx")
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({"Amount": [1, 2, 3]}).to_excel(writer, sheet_name="North", index=False)
+        pd.DataFrame({"Amount": [10, 20]}).to_excel(writer, sheet_name="South", index=False)
+    return path
+
+
+def _run(path, sheet, company_id="company-a"):
+    df = read_dataframe(path, sheet=sheet)
+    result = RuleEngine().run(
+        df,
+        WORKFLOW,
+        input_hash=CheckpointStore.input_key(company_id, "same-content", sheet, {}),
+        mode="standard"
+    )
+    try:
+        return result["outputs"]["Out"]["Amount"].tolist(), result["logs"]
+    finally:
+        result["outputs"].close()
+
+
+def _resumed(caplog) -> bool:
+    return any("Resumed from checkpoint" in record.getMessage() for record in caplog.records)
+
+
+def test_sheets_of_one_workbook_do_not_share_checkpoints(store, workbook, caplog):
+    caplog.set_level(logging.INFO, logger="app.engine.engine")
+    assert _run(workbook, "North")[0] == [1, 2, 3]
+
+    rows, _ = _run(workbook, "South")
+    assert rows == [10, 20]
+    assert not _resumed(caplog)
+
+
+def test_rerun_of_same_sheet_resumes(store, workbook, caplog):
+    caplog.set_level(logging.INFO, logger="app.engine.engine")
+    _, first_logs = _run(workbook, "North")
+
+    rows, logs = _run(workbook, "North")
+    assert rows == [1, 2, 3]
+    assert _resumed(caplog)
+    # One log per step, as in a fresh run, so stored step indexes line up
+    assert [entry["step_type"] for entry in logs] == [entry["step_type"] for entry in first_logs]
+
+
+def test_input_key_covers_company_sheet_and_read_options():
+    base = CheckpointStore.input_key("a", "abc", "North", {})
+    assert base != CheckpointStore.input_key("b", "abc", "North", {})
+    assert base != CheckpointStore.input_key("a", "abc", "South", {})
+    assert base != CheckpointStore.input_key("a", "abc", "North", {"dtype_backend": "pyarrow"})
+    assert base == CheckpointStore.input_key("a", "abc", "North", None)
+
+
+def test_companies_do_not_share_checkpoints(store, workbook, caplog):
+    caplog.set_level(logging.INFO, logger="app.engine.engine")
+    _run(workbook, "North", company_id="company-a")
+
+    rows, _ = _run(workbook, "North", company_id="company-b")
+    assert rows == [1, 2, 3]
+    assert not _resumed(caplog)
+
+
+def test_oversized_state_is_not_written(tmp_path, monkeypatch, workbook):
+    store = CheckpointStore(str(tmp_path / "small"), 64)
+    monkeypatch.setattr(engine_module, "checkpoint_store", store)
+    saved = []
+    monkeypatch.setattr(store, "save", lambda key, state: saved.append(key))
+
+    _run(workbook, "North")
+    assert saved == []
@@ -0,0 +1,46 @@
+import zipfile
+
+import pytest
+
+from app.engine.cost import EXCEL_MAX_ROWS, ExecutionRejected, estimate_execution
+
+
+MOVE_ALL = {"steps": [{"type": "move", "target_sheet": "All"}]}
+
+
+@pytest.fixture
+def large_xlsx(tmp_path):
+    """Workbook whose dimension record claims more rows than Excel allows"""
+    path = str(tmp_path / "large.xlsx")
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(
+            "xl/worksheets/sheet1.xml",
+            f'<worksheet><dimension ref="A1:B{EXCEL_MAX_ROWS + 10}"/><sheetData/></worksheet>'
+        )
+    return path
+
+
+def test_csv_row_estimate_does_not_reject_move(tmp_path):
+    # Increasing ids: the sampled first lines are shorter than average, so
+    # the extrapolated row count is well above the real 950,000
+    path = tmp_path / "input.csv"
+    with open(path, "w") as f:
+        f.write("Id,Name\n")
+        f.writelines(f"{i},row\n" for i in range(950_000))
+
+    estimate = estimate_execution(str(path), MOVE_ALL)
+    assert estimate["output_rows"]["All"] >= EXCEL_MAX_ROWS
+
+
+def test_exact_row_count_over_limit_rejects_move(large_xlsx):
+    with pytest.raises(ExecutionRejected, match="over Excel's limit"):
+        estimate_execution(large_xlsx, MOVE_ALL)
+
+
+def test_inner_lookup_makes_row_count_inexact(large_xlsx):
+    workflow = {"steps": [
+        {"type": "lookup", "reference_file_id": "ref", "on": "A", "columns": ["B"], "how": "inner"},
+        {"type": "move", "target_sheet": "All"},
+    ]}
+    estimate = estimate_execution(large_xlsx, workflow)
+    assert estimate["output_rows"]["All"] == EXCEL_MAX_ROWS + 9
@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+from app.engine.dag import WorkflowGraphError, branch_levels, referenced_file_ids
+from app.engine.validator import WorkflowValidationError, validate_workflow
+
+
+def _names(levels):
+    return [[branch["name"] for branch in level] for level in levels]
+
+
+def test_levels_follow_dependencies_and_keep_declaration_order():
+    levels = branch_levels([
+        {"name": "a"},
+        {"name": "c", "from": "b"},
+        {"name": "b", "from": "a"},
+        {"name": "d", "from": "input"},
+    ])
+    assert _names(levels) == [["a", "d"], ["b"], ["c"]]
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(WorkflowGraphError, match="cycle"):
+        branch_levels([{"name": "a", "from": "b"}, {"name": "b", "from": "a"}])
+
+
+@pytest.mark.parametrize("branches, message", [
+    ([{"name": "a", "from": "missing"}], "unknown frame 'missing'"),
+    ([{"name": "a"}, {"name": "a"}], "duplicate name 'a'"),
+    ([{"name": "input"}], "reserved"),
+    ([{"from": "input"}], "missing 'name'"),
+])
+def test_invalid_graphs_are_rejected(branches, message):
+    with pytest.raises(WorkflowGraphError, match=message):
+        branch_levels(branches)
+
+
+def test_referenced_file_ids_include_branches():
+    workflow = {
+        "steps": [{"type": "lookup", "reference_file_id": "a"}],
+        "branches": [{"name": "x", "steps": [{"type": "join", "reference_file_id": "b"}]}],
+    }
+    assert referenced_file_ids(workflow) == {"a", "b"}
+
+
+DF = pd.DataFrame({"Region": ["N", "S"], "Amount": [1, 2]})
+
+
+def _move(sheet):
+    return {"type": "move", "target_sheet": sheet}
+
+
+def _split(prefix=""):
+    return {"type": "split_by", "column": "Region", "target_sheet_prefix": prefix}
+
+
+def test_branch_uses_parent_columns():
+    workflow = {"branches": [
+        {"name": "a", "steps": [_move("A")]},
+        {"name": "b", "from": "a", "steps": [{"type": "sort", "by": "Missing"}]},
+    ]}
+    with pytest.raises(WorkflowValidationError, match="Branch 'b' Step 0: column 'Missing'"):
+        validate_workflow(workflow, DF)
+
+
+@pytest.mark.parametrize("workflow, message", [
+    # Sibling branches writing the same sheet
+    ({"branches": [
+        {"name": "a", "steps": [_move("Out")]},
+        {"name": "b", "steps": [_move("Out")]},
+    ]}, "sheet 'Out' is also written by branch 'a'"),
+    # A branch overwriting a sheet of the top-level steps
+    ({"steps": [_move("Out")], "branches": [
+        {"name": "a", "steps": [_move("Out")]},
+    ]}, "sheet 'Out' is also written by the top-level steps"),
+    # split_by names in concurrent branches
+    ({"branches": [
+        {"name": "a", "steps": [_split("Region ")]},
+        {"name": "b", "steps": [_split("Region ")]},
+    ]}, "prefix 'Region '"),
+    ({"branches": [
+        {"name": "a", "steps": [_split()]},
+        {"name": "b", "steps": [_move("Totals")]},
+    ]}, "sheet 'Totals' may collide with split_by sheets of branch 'a'"),
+])
+def test_sheet_collisions_are_rejected(workflow, message):
+    with pytest.raises(WorkflowValidationError, match=message):
+        validate_workflow(workflow, DF)
+
+
+def test_distinct_sheets_and_prefixes_are_accepted():
+    validate_workflow({"steps": [_move("All")], "branches": [
+        {"name": "a", "steps": [_split("North ")]},
+        {"name": "b", "steps": [_split("South ")]},
+        {"name": "c", "from": "a", "steps": [_move("Copy")]},
+    ]}, DF)
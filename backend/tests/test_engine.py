@@ -0,0 +1,145 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from app.cancellation import ExecutionCancelled
+from app.engine.engine import RuleEngine, copy_on_write
+
+
+def test_copy_on_write_stays_on_while_any_run_needs_it():
+    first_inside = threading.Event()
+    first_may_leave = threading.Event()
+    seen = []
+
+    def first_run():
+        with copy_on_write():
+            first_inside.set()
+            first_may_leave.wait(5)
+            seen.append(pd.get_option("mode.copy_on_write"))
+
+    thread = threading.Thread(target=first_run)
+    thread.start()
+    first_inside.wait(5)
+
+    # A second, shorter run must not switch the option off under the first
+    with copy_on_write():
+        assert pd.get_option("mode.copy_on_write") is True
+
+    first_may_leave.set()
+    thread.join(5)
+
+    assert seen == [True]
+    assert pd.get_option("mode.copy_on_write") is False
+
+
+DF = pd.DataFrame({"Id": [1, 2, 3, 4], "Amount": [5, 50, 500, 5000]})
+
+
+def _run(workflow, **kwargs):
+    result = RuleEngine().run(DF, workflow, mode="standard", **kwargs)
+    try:
+        return {name: df["Amount"].tolist() for name, df in result["outputs"].items()}, result["logs"]
+    finally:
+        result["outputs"].close()
+
+
+def test_branches_start_from_their_parent_frame():
+    outputs, logs = _run({
+        "steps": [{"type": "filter", "column": "Amount", "operator": ">", "value": 10}],
+        "branches": [
+            {"name": "large", "steps": [
+                {"type": "filter", "column": "Amount", "operator": ">", "value": 100},
+                {"type": "move", "target_sheet": "Large"},
+            ]},
+            {"name": "all", "steps": [{"type": "move", "target_sheet": "All"}]},
+            {"name": "top", "from": "large", "steps": [
+                {"type": "top_n", "by": "Amount", "n": 1},
+                {"type": "move", "target_sheet": "Top"},
+            ]},
+        ],
+    })
+
+    assert outputs == {"Large": [500, 5000], "All": [50, 500, 5000], "Top": [5000]}
+    # Declaration order within a level, prefixed with the branch name
+    assert [entry["message"].split("]")[0] for entry in logs[1:]] == [
+        "[large", "[large", "[all", "[top", "[top"
+    ]
+
+
+def test_shared_parent_frame_is_not_modified():
+    before = DF.copy()
+    _run({"branches": [
+        {"name": "a", "steps": [{"type": "sort", "by": "Amount", "ascending": False},
+                                {"type": "move", "target_sheet": "A"}]},
+        {"name": "b", "steps": [{"type": "dedupe"}, {"type": "move", "target_sheet": "B"}]},
+    ]})
+    pd.testing.assert_frame_equal(DF, before)
+
+
+def test_branch_failure_names_the_branch_and_keeps_the_cause():
+    workflow = {"branches": [
+        {"name": "ok", "steps": [{"type": "move", "target_sheet": "Ok"}]},
+        {"name": "bad", "steps": [
+            {"type": "lookup", "reference_file_id": "missing", "on": "Id", "columns": ["Name"]},
+        ]},
+    ]}
+
+    with pytest.raises(Exception, match="in branch 'bad' at step 0") as info:
+        _run(workflow)
+    assert isinstance(info.value.__cause__, ValueError)
+
+
+def test_failure_aborts_later_levels():
+    ran = []
+
+    def should_cancel():
+        ran.append(1)
+        return False
+
+    workflow = {"branches": [
+        {"name": "bad", "steps": [
+            {"type": "lookup", "reference_file_id": "missing", "on": "Id", "columns": ["Name"]},
+        ]},
+        {"name": "child", "from": "bad", "steps": [{"type": "move", "target_sheet": "Child"}]},
+    ]}
+
+    with pytest.raises(Exception, match="in branch 'bad'"):
+        _run(workflow, should_cancel=should_cancel)
+    # Only the failing branch's single step was ever started
+    assert len(ran) == 1
+
+
+def test_cancellation_stops_branches():
+    calls = []
+
+    def should_cancel():
+        calls.append(1)
+        return len(calls) > 1
+
+    with pytest.raises(ExecutionCancelled):
+        _run({"branches": [
+            {"name": "a", "steps": [{"type": "move", "target_sheet": "A"},
+                                    {"type": "move", "target_sheet": "A2"}]},
+        ]}, should_cancel=should_cancel)
+
+
+def _pivot(margins):
+    df = pd.DataFrame({"Region": ["N", "N", "S"], "Month": ["Jan", "Feb", "Mar"], "Amount": [1, 2, 3]})
+    step = {
+        "type": "pivot", "index": "Region", "columns": "Month", "values": "Amount",
+        "margins": margins, "max_columns": 3, "target_sheet": "Pivot",
+    }
+    result = RuleEngine().run(df, {"steps": [step]}, mode="standard")
+    try:
+        return list(result["outputs"]["Pivot"].columns)
+    finally:
+        result["outputs"].close()
+
+
+def test_pivot_width_limit_counts_margins_column():
+    assert _pivot(margins=False) == ["Region", "Jan", "Feb", "Mar"]
+
+    with pytest.raises(Exception, match="4 columns \\(including margins\\)") as info:
+        _pivot(margins=True)
+    assert isinstance(info.value.__cause__, ValueError)
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from app.engine.outputs import OutputStore, frame_bytes
+
+
+def test_frame_bytes_is_exact_for_numeric_frames():
+    df = pd.DataFrame({"Id": range(10_000), "Amount": 1.5})
+    assert frame_bytes(df) == df.memory_usage(index=True, deep=True).sum()
+
+
+def test_frame_bytes_estimates_string_columns():
+    df = pd.DataFrame({"Id": range(50_000), "Name": [f"customer-{i}" for i in range(50_000)]})
+    deep = df.memory_usage(index=True, deep=True).sum()
+    assert frame_bytes(df) == pytest.approx(deep, rel=0.05)
+
+
+def test_shared_frames_are_not_counted_or_spilled(tmp_path):
+    df = pd.DataFrame({"Amount": range(1_000)})
+    size = frame_bytes(df)
+    store = OutputStore(size, str(tmp_path))
+
+    store.add("Shared", df, shared=True)
+    store["Own"] = df.copy()
+    assert store.memory_bytes == size
+    assert store.total_bytes == 2 * size
+    assert not store.has_spilled
+
+    # Over budget: only the frame the store owns is spilled
+    store["More"] = df.copy()
+    assert store.has_spilled
+    assert store["Shared"] is df
+    assert store.memory_bytes == size
+
+    del store["Shared"]
+    assert store.total_bytes == size
+    store.close()
@@ -0,0 +1,105 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.readers.excel import columnar_sidecar_path
+from app.readers.factory import read_dataframe
+
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / "input.csv")
+    pd.DataFrame({"Name": ["a", "b", None], "Amount": [1, 2, 3]}).to_csv(path, index=False)
+    return path
+
+
+def test_arrow_read_does_not_leak_arrow_dtypes_into_sidecar(csv_path):
+    arrow = read_dataframe(csv_path, dtype_backend="pyarrow")
+    assert isinstance(arrow["Amount"].dtype, pd.ArrowDtype)
+
+    # Served from the sidecar written by the Arrow read
+    assert os.path.exists(columnar_sidecar_path(csv_path))
+    standard = read_dataframe(csv_path)
+    assert standard["Amount"].dtype == "int64"
+    assert standard["Name"].dtype == object
+
+
+def test_standard_read_sidecar_serves_arrow_reads(csv_path):
+    read_dataframe(csv_path)
+
+    arrow = read_dataframe(csv_path, dtype_backend="pyarrow")
+    assert isinstance(arrow["Amount"].dtype, pd.ArrowDtype)
+    assert arrow["Name"].tolist()[:2] == ["a", "b"]
+
+
+def test_sidecar_keeps_values_and_columns(csv_path):
+    first = read_dataframe(csv_path)
+    assert os.path.exists(columnar_sidecar_path(csv_path))
+
+    again = read_dataframe(csv_path)
+    pd.testing.assert_frame_equal(first, again)
+
+
+def test_csv_reader_stops_when_cancelled(tmp_path):
+    from app.cancellation import ExecutionCancelled
+    from app.readers.delimited import CANCEL_CHECK_BYTES, CsvReader
+
+    path = str(tmp_path / "large.csv")
+    rows = CANCEL_CHECK_BYTES // 8
+    pd.DataFrame({"Id": range(rows), "Code": "abcdef"}).to_csv(path, index=False)
+
+    checks = []
+    df = CsvReader().read(path, should_cancel=lambda: checks.append(1) or False)
+    assert len(df) == rows
+    assert checks
+
+    with pytest.raises(ExecutionCancelled):
+        CsvReader().read(path, should_cancel=lambda: True)
+
+
+def test_default_csv_reader_stops_when_cancelled(tmp_path):
+    from app.cancellation import ExecutionCancelled
+    from app.readers.delimited import CANCEL_CHECK_BYTES
+    from app.readers.factory import select_reader
+
+    path = str(tmp_path / "large.csv")
+    rows = CANCEL_CHECK_BYTES // 8
+    pd.DataFrame({"Id": range(rows), "Code": "abcdef"}).to_csv(path, index=False)
+    assert select_reader(path).name == "csv_arrow"
+
+    # Before any successful read, so no sidecar serves it
+    with pytest.raises(ExecutionCancelled):
+        read_dataframe(path, should_cancel=lambda: True)
+
+    checks = []
+    df = read_dataframe(path, should_cancel=lambda: checks.append(1) or False)
+    assert len(df) == rows
+    assert len(checks) >= 2
+    pd.testing.assert_frame_equal(df, pd.read_csv(path))
+
+
+def test_sidecar_keeps_non_string_column_names(tmp_path):
+    path = str(tmp_path / "years.xlsx")
+    pd.DataFrame({"Region": ["N", "S"], 2023: [1, 2], 2024: [3, 4]}).to_excel(path, index=False)
+
+    first = read_dataframe(path)
+    assert os.path.exists(columnar_sidecar_path(path))
+
+    again = read_dataframe(path)
+    assert list(again.columns) == list(first.columns) == ["Region", 2023, 2024]
+    pd.testing.assert_frame_equal(first, again)
+
+    from app.readers.factory import read_columns
+    assert list(read_columns(path)) == ["Region", 2023, 2024]
+
+
+def test_no_sidecar_for_date_headers(tmp_path):
+    from app.readers.excel import ColumnarCacheReader
+
+    df = pd.DataFrame({pd.Timestamp("2024-01-01"): [1]})
+    assert ColumnarCacheReader.store(str(tmp_path / "dates.xlsx"), df) is None
+    assert not os.path.exists(columnar_sidecar_path(str(tmp_path / "dates.xlsx")))
@@ -0,0 +1,127 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.responses import file_download
+
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+HASH = "abc123"
+ETAG = f'"{HASH}"'
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = FastAPI()
+    paths = {
+        "report.xlsx": tmp_path / "report.xlsx",
+        "report.csv": tmp_path / "report.csv",
+    }
+    for path in paths.values():
+        path.write_bytes(CONTENT)
+
+    @app.get("/files/{name}")
+    def download(name: str, request: Request):
+        return file_download(request, str(paths[name]), name, HASH)
+
+    return TestClient(app)
+
+
+def test_full_download_has_validators(client):
+    response = client.get("/files/report.xlsx")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"] == ETAG
+    assert response.headers["accept-ranges"] == "bytes"
+
+
+def test_if_none_match_returns_304(client):
+    response = client.get("/files/report.xlsx", headers={"If-None-Match": f"W/{ETAG}"})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+@pytest.mark.parametrize("header, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=1000-", 1000, 1023),
+    ("bytes=-24", 1000, 1023),
+    ("bytes=1000-5000", 1000, 1023),
+])
+def test_range_returns_partial_content(client, header, start, end):
+    response = client.get("/files/report.xlsx", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(CONTENT)}"
+    assert response.content == CONTENT[start:end + 1]
+
+
+@pytest.mark.parametrize("header", ["bytes=1024-", "bytes=500-100", "bytes=-0"])
+def test_unsatisfiable_range_returns_416(client, header):
+    response = client.get("/files/report.xlsx", headers={"Range": header})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+@pytest.mark.parametrize("header", ["bytes=0-1,5-6", "items=0-1", "bytes=-"])
+def test_unsupported_range_returns_whole_file(client, header):
+    response = client.get("/files/report.xlsx", headers={"Range": header})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_if_range_matching_etag_honours_range(client):
+    response = client.get("/files/report.xlsx", headers={"Range": "bytes=0-9", "If-Range": ETAG})
+    assert response.status_code == 206
+    assert response.content == CONTENT[:10]
+
+
+def test_if_range_stale_etag_returns_whole_file(client):
+    response = client.get("/files/report.xlsx", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+def test_gzip_only_for_delimited_files(client):
+    csv = client.get("/files/report.csv", headers={"Accept-Encoding": "gzip"})
+    assert csv.headers["content-encoding"] == "gzip"
+    assert csv.headers["etag"] == f'"{HASH}-gzip"'
+    assert csv.content == CONTENT  # decoded by the client
+
+    xlsx = client.get("/files/report.xlsx", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in xlsx.headers
+    assert xlsx.content == CONTENT
+
+
+def test_range_is_not_gzipped(client):
+    response = client.get("/files/report.csv", headers={"Range": "bytes=0-9", "Accept-Encoding": "gzip"})
+    assert response.status_code == 206
+    assert "content-encoding" not in response.headers
+    assert response.content == CONTENT[:10]
+
+
+def test_models_to_json_reads_attributes_and_keeps_headers():
+    import json
+    from datetime import datetime
+    from types import SimpleNamespace
+    from uuid import uuid4
+
+    from fastapi import Response
+
+    from app.responses import json_response
+    from app.schemas import ExecutionLogResponse
+    from app.serialization import models_to_json
+
+    log = SimpleNamespace(
+        step_index=0, step_type="filter", message="Kept 2 rows", affected_rows=2,
+        created_at=datetime(2024, 1, 1), execution_id=uuid4()
+    )
+    injected = Response()
+    injected.headers["X-Next-Cursor"] = "abc"
+
+    response = json_response(models_to_json(ExecutionLogResponse, [log]), injected)
+
+    assert response.headers["x-next-cursor"] == "abc"
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.body) == [{
+        "step_index": 0, "step_type": "filter", "message": "Kept 2 rows",
+        "affected_rows": 2, "created_at": "2024-01-01T00:00:00",
+    }]
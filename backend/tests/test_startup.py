@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold import of the API app; generous enough for slow CI, far below pandas + Celery
+IMPORT_BUDGET_SECONDS = 1.5
+
+# Must not be imported until a route needs them
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "pyarrow", "celery", "redis", "app.engine.engine")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _import_app():
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_api_import_skips_heavy_modules():
+    probe = _import_app()
+    assert probe["loaded"] == []
+
+
+def test_api_import_within_budget():
+    # Best of three, so one slow run on a busy machine does not fail the build
+    elapsed = min(_import_app()["elapsed"] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET_SECONDS, f"app.main imported in {elapsed:.2f}s"
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+from app.engine.validator import WorkflowValidationError, validate_workflow
+
+
+DF = pd.DataFrame({"Region": ["N", "S"], "Month": ["Jan", "Feb"], "Amount": [1, 2]})
+
+
+@pytest.mark.parametrize("n", [True, False, 0, -1, 1.5, "3", None])
+def test_top_n_rejects_non_positive_integers(n):
+    with pytest.raises(WorkflowValidationError, match="positive integer 'n'"):
+        validate_workflow({"steps": [{"type": "top_n", "by": "Amount", "n": n}]}, DF)
+
+
+def test_top_n_accepts_positive_integer():
+    validate_workflow({"steps": [{"type": "top_n", "by": "Amount", "n": 1}]}, DF)
+
+
+@pytest.mark.parametrize("value", [True, False, 0, 1.5])
+def test_split_by_rejects_non_positive_integer_max_partitions(value):
+    step = {"type": "split_by", "column": "Region", "max_partitions": value}
+    with pytest.raises(WorkflowValidationError, match="'max_partitions' must be a positive integer"):
+        validate_workflow({"steps": [step]}, DF)
+
+
+@pytest.mark.parametrize("value", [True, False, 0, 1.5, 10_000])
+def test_pivot_rejects_invalid_max_columns(value):
+    step = {
+        "type": "pivot", "index": "Region", "columns": "Month", "values": "Amount",
+        "max_columns": value, "target_sheet": "Pivot",
+    }
+    with pytest.raises(WorkflowValidationError, match="'max_columns' must be between 1 and"):
+        validate_workflow({"steps": [step]}, DF)
+
+
+def _lookup(**params):
+    return {"steps": [{"type": "lookup", "reference_file_id": "ref", "on": "Region", "columns": ["Name"], **params}]}
+
+
+@pytest.mark.parametrize("reference_key", [["Code"], {"a": 1}, True])
+def test_lookup_rejects_invalid_reference_key(reference_key):
+    with pytest.raises(WorkflowValidationError, match="'reference_key' must be a single column name"):
+        validate_workflow(_lookup(reference_key=reference_key), DF)
+
+
+@pytest.mark.parametrize("params, key", [
+    ({"columns": ["Region", "Name"]}, "Region"),
+    ({"reference_key": "Code", "columns": ["Code"]}, "Code"),
+])
+def test_lookup_columns_cannot_include_the_key(params, key):
+    with pytest.raises(WorkflowValidationError, match=f"cannot include the lookup key '{key}'"):
+        validate_workflow(_lookup(**params), DF)
+
+
+def test_lookup_accepts_distinct_key_and_columns():
+    validate_workflow(_lookup(reference_key="Code", columns=["Name"]), DF)